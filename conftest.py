@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(scope='session', autouse=True)
+def private_storage():
+    """Тесты не трогают кэш и метрики сервера разработки."""
+    from core.testing import private_storage
+    with private_storage():
+        yield
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     name = 'core'
     verbose_name = 'основа'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import counters  # noqa: F401
+        from .db import configure_sqlite
+        from .slow_queries import add_slow_query_wrapper
+
+        connection_created.connect(configure_sqlite)
+        connection_created.connect(add_slow_query_wrapper)
@@ -0,0 +1,187 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Журнал удалений в общем кэше: номер последней записи и сами записи
+# со списками удалённых ключей. Процессы читают новые записи журнала
+# и удаляют из своего уровня только эти ключи.
+JOURNAL_SEQUENCE_KEY = 'two_tier:journal'
+JOURNAL_ENTRY_KEY = 'two_tier:journal:{}'
+# Записи журнала живут недолго: локальные значения всё равно устаревают
+# через LOCAL_TIMEOUT. Процесс, отставший больше чем на JOURNAL_MAX_GAP
+# записей, очищает свой уровень целиком.
+JOURNAL_TIMEOUT = 5 * 60
+JOURNAL_MAX_GAP = 1000
+
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class LocalTier:
+    """Ограниченный LRU-кэш процесса со временем жизни записей."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.sequence = None
+        self.synced = 0.0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + timeout, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class TwoTierCache(BaseCache):
+    """
+    Кэш из двух уровней: LRU в памяти процесса перед общим кэшем.
+
+    LOCATION — псевдоним общего кэша из CACHES. Чтение сначала ищет ключ
+    в памяти процесса, запись идёт в оба уровня. Удаление и `incr`
+    добавляют ключ в журнал в общем кэше; процессы читают журнал не
+    чаще раза в SYNC_INTERVAL секунд и удаляют из своего уровня только
+    перечисленные ключи, остальные горячие ключи остаются в памяти.
+    Перезапись ключа в другом процессе видна не позже LOCAL_TIMEOUT;
+    журнал ведётся без блокировок, и потерянная запись в нём тоже
+    устаревает не дольше LOCAL_TIMEOUT.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = location
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self._sync_interval = options.get('SYNC_INTERVAL', 1)
+        # Экземпляр бэкенда создаётся для каждого потока,
+        # а локальный уровень общий на процесс.
+        with _tiers_lock:
+            self._tier = _tiers.setdefault(
+                location, LocalTier(options.get('LOCAL_MAX_ENTRIES', 1000)),
+            )
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _sync(self):
+        tier = self._tier
+        now = time.monotonic()
+        if now - tier.synced < self._sync_interval:
+            return
+        tier.synced = now
+        sequence = self.shared.get(JOURNAL_SEQUENCE_KEY, 0)
+        previous, tier.sequence = tier.sequence, sequence
+        if previous is None or sequence == previous:
+            return
+        if not 0 < sequence - previous <= JOURNAL_MAX_GAP:
+            # Общий кэш очищен или процесс слишком долго не сверялся.
+            tier.clear()
+            return
+        entries = self.shared.get_many([
+            JOURNAL_ENTRY_KEY.format(number)
+            for number in range(previous + 1, sequence + 1)
+        ])
+        for keys in entries.values():
+            for key in keys:
+                tier.delete(key)
+
+    def _invalidate(self, keys, version=None):
+        """Удаляет ключи из своего уровня и записывает их в журнал."""
+        local_keys = [self.make_key(key, version=version) for key in keys]
+        for local_key in local_keys:
+            self._tier.delete(local_key)
+        try:
+            sequence = self.shared.incr(JOURNAL_SEQUENCE_KEY)
+        except ValueError:
+            self.shared.add(JOURNAL_SEQUENCE_KEY, 0, None)
+            sequence = self.shared.incr(JOURNAL_SEQUENCE_KEY)
+        self.shared.set(JOURNAL_ENTRY_KEY.format(sequence), local_keys,
+                        JOURNAL_TIMEOUT)
+
+    def _local_set(self, key, value, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        local_timeout = self._local_timeout
+        if timeout is not None:
+            local_timeout = min(local_timeout, timeout)
+        if local_timeout > 0:
+            self._tier.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                           local_timeout)
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_key(key, version=version)
+        self.validate_key(local_key)
+        self._sync()
+        pickled = self._tier.get(local_key)
+        if pickled is not None:
+            return pickle.loads(pickled)
+        missing = object()
+        value = self.shared.get(key, missing, version=version)
+        if value is missing:
+            return default
+        self._local_set(local_key, value, self._local_timeout)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_key(key, version=version)
+        self.validate_key(local_key)
+        self.shared.set(key, value, timeout, version=version)
+        self._local_set(local_key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if not self.shared.add(key, value, timeout, version=version):
+            return False
+        self._local_set(self.make_key(key, version=version), value, timeout)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._tier.delete(self.make_key(key, version=version))
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.shared.delete(key, version=version)
+        self._invalidate([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.shared.delete_many(keys, version=version)
+        self._invalidate(keys, version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        self._invalidate([key], version)
+        return value
+
+    def clear(self):
+        # Журнал очищается вместе с общим кэшем; другие процессы видят
+        # сброс номера и очищают свой уровень целиком.
+        self.shared.clear()
+        self._tier.clear()
+        self._tier.sequence = 0
@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from . import jobs
+
+logger = logging.getLogger('yatube')
+
+_counters = {}
+
+
+class BufferedCounter:
+    """
+    Счётчик в памяти процесса с периодической записью в базу.
+
+    Приращения копятся в словаре и записываются одним запросом
+    `UPDATE ... SET field = field + CASE pk WHEN ... END` не чаще раза
+    в `flush_interval` секунд или при `max_pending` разных строках.
+    Из запроса приращения не записываются, а передаются фоновой задаче
+    одной вставкой. При падении процесса теряется не больше этих
+    приращений.
+    """
+
+    # Запас по числу параметров запроса для SQLite.
+    BATCH_SIZE = 400
+
+    def __init__(self, model, field, flush_interval=10, max_pending=1000,
+                 on_flush=None):
+        self.model = model
+        self.field = field
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.on_flush = on_flush
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.flushed = time.monotonic()
+        self.name = f'{model._meta.label}.{field}'
+        _counters[self.name] = self
+
+    def add(self, pk, value=1):
+        with self.lock:
+            self.pending[pk] = self.pending.get(pk, 0) + value
+            due = (
+                len(self.pending) >= self.max_pending
+                or time.monotonic() - self.flushed >= self.flush_interval
+            )
+        if due:
+            self.flush_later()
+
+    def unflushed(self, pk):
+        """Приращение строки, ещё не записанное этим процессом."""
+        return self.pending.get(pk, 0)
+
+    def _take(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.flushed = time.monotonic()
+        return pending
+
+    def _restore(self, pending):
+        with self.lock:
+            for pk, value in pending.items():
+                self.pending[pk] = self.pending.get(pk, 0) + value
+
+    def flush(self, final=False):
+        """
+        Записывает накопленные приращения; возвращает их словарь.
+
+        При ошибке приращения возвращаются в буфер до следующей попытки;
+        при `final` попыток больше не будет, и ошибка пишется одной
+        строкой.
+        """
+        pending = self._take()
+        if not pending:
+            return pending
+        try:
+            self.write(pending)
+        except Exception as error:
+            if final:
+                logger.error('Потеряны приращения счётчика %s: %s',
+                             self.name, error)
+                return {}
+            logger.exception('Не удалось записать счётчик %s', self.name)
+            self._restore(pending)
+            return {}
+        return pending
+
+    def flush_later(self):
+        """Передаёт накопленные приращения фоновой задаче."""
+        pending = self._take()
+        if not pending:
+            return
+        try:
+            jobs.enqueue('core.write_counter', counter=self.name,
+                         increments=list(pending.items()))
+        except Exception:
+            logger.exception('Не удалось передать счётчик %s', self.name)
+            self._restore(pending)
+
+    def write(self, pending):
+        """Записывает приращения `{pk: value}` в базу."""
+        items = list(pending.items())
+        with transaction.atomic():
+            for start in range(0, len(items), self.BATCH_SIZE):
+                self._update(items[start:start + self.BATCH_SIZE])
+            if self.on_flush is not None:
+                self.on_flush(pending)
+
+    def _update(self, batch):
+        self.model.objects.filter(
+            pk__in=[pk for pk, _ in batch],
+        ).update(**{self.field: F(self.field) + Case(
+            *(When(pk=pk, then=Value(value)) for pk, value in batch),
+            output_field=IntegerField(),
+        )})
+
+
+def flush_all():
+    """
+    Записывает все счётчики процесса при его штатной остановке.
+
+    Регистрируется через atexit в точке входа WSGI, чтобы не срабатывать
+    в командах и тестах.
+    """
+    for counter in _counters.values():
+        counter.flush(final=True)
+
+
+@jobs.register('core.write_counter')
+def write_counter(counter, increments):
+    _counters[counter].write(dict(increments))
@@ -0,0 +1,14 @@
+def apply_pragmas(cursor, pragmas):
+    """Выполняет PRAGMA из словаря `имя: значение`."""
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет профиль SQLITE_PRAGMAS к каждому новому соединению."""
+    from django.conf import settings
+
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
@@ -0,0 +1,34 @@
+import logging
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+logger = logging.getLogger('yatube.query_budget')
+
+
+def query_budget(max_queries):
+    """
+    Задаёт бюджет SQL-запросов для представления.
+
+    Бюджет сохраняется в атрибуте `query_budget` представления, по нему
+    его проверяют тесты. При включённом `QUERY_BUDGET_ENFORCE` запросы
+    подсчитываются, а превышение бюджета пишется в лог.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not settings.QUERY_BUDGET_ENFORCE:
+                return view_func(request, *args, **kwargs)
+            with CaptureQueriesContext(connection) as queries:
+                response = view_func(request, *args, **kwargs)
+            if len(queries) > max_queries:
+                logger.warning(
+                    '%s: %d SQL-запросов при бюджете %d',
+                    request.path, len(queries), max_queries,
+                )
+            return response
+        wrapper.query_budget = max_queries
+        return wrapper
+    return decorator
@@ -0,0 +1,105 @@
+import re
+from functools import wraps
+from urllib.parse import parse_qsl, urlencode
+
+from django.template.loader import render_to_string
+
+# Пользовательский текст в шаблонах экранируется, поэтому подделать
+# такой комментарий из содержимого записи нельзя.
+PLACEHOLDER = '<!--fragment:{}:{}-->'
+PLACEHOLDER_RE = re.compile(r'<!--fragment:([\w-]+):([^>]*)-->')
+
+_registry = {}
+# Фрагменты, которые меняются и без изменения записей (счётчики):
+# их нельзя хранить даже в готовой странице для гостей.
+_volatile = set()
+
+
+def register(name, volatile=False):
+    """
+    Регистрирует фрагмент страницы, зависящий от пользователя.
+
+    Функция получает запрос и список параметров всех вхождений фрагмента
+    на странице и возвращает список HTML-строк в том же порядке, поэтому
+    данные для всех вхождений можно получить одним запросом.
+    """
+    def decorator(func):
+        _registry[name] = func
+        if volatile:
+            _volatile.add(name)
+        return func
+    return decorator
+
+
+def register_template(name, template_name):
+    """Фрагмент, который рендерит шаблон с контекстом запроса."""
+    @register(name)
+    def render_fragments(request, params_list):
+        return [
+            render_to_string(template_name, params, request)
+            for params in params_list
+        ]
+    return render_fragments
+
+
+def render(request, name, params):
+    """Фрагмент или заглушка для последующей подстановки."""
+    if getattr(request, 'punch_holes', False):
+        return PLACEHOLDER.format(name, urlencode(sorted(params.items())))
+    return _registry[name](request, [params])[0]
+
+
+def substitute(request, content, keep_volatile=False):
+    """
+    Подставляет фрагменты текущего пользователя вместо заглушек.
+
+    При `keep_volatile` заглушки изменчивых фрагментов остаются на месте.
+    """
+    matches = [
+        match for match in PLACEHOLDER_RE.finditer(content)
+        if not (keep_volatile and match.group(1) in _volatile)
+    ]
+    if not matches:
+        return content
+    grouped = {}
+    for match in matches:
+        grouped.setdefault(match.group(1), []).append(
+            dict(parse_qsl(match.group(2), keep_blank_values=True)),
+        )
+    rendered = {
+        name: iter(_registry[name](request, params_list))
+        for name, params_list in grouped.items()
+    }
+    return PLACEHOLDER_RE.sub(
+        lambda match: (
+            next(rendered[match.group(1)]) if match.group(1) in rendered
+            else match.group(0)
+        ),
+        content,
+    )
+
+
+def substitute_response(request, response):
+    """Подставляет фрагменты в готовый HTML-ответ."""
+    if not response.streaming and response.get('Content-Type', '').startswith(
+        'text/html'
+    ):
+        response.content = substitute(request, response.content.decode())
+    return response
+
+
+def user_fragments(view_func):
+    """
+    Рендерит страницу с заглушками и подставляет фрагменты в конце.
+
+    Так все вхождения одного фрагмента обрабатываются одним вызовом.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        request.punch_holes = True
+        try:
+            response = view_func(request, *args, **kwargs)
+        finally:
+            request.punch_holes = False
+        return substitute_response(request, response)
+    return wrapper
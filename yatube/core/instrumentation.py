@@ -0,0 +1,185 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+
+# Префикс ключей, которые создаёт тег {% cache %}.
+FRAGMENT_PREFIX = 'template.cache.'
+
+_local = threading.local()
+_installed = False
+
+
+class RequestStats:
+    """Счётчики времени одного запроса: SQL, шаблоны и кэш."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.slow_queries = []
+        self.templates = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.fragment_hits = 0
+        self.fragment_misses = 0
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def template_time(self):
+        # Время шаблонов включает вложенные include, поэтому
+        # в сумму идёт только самый внешний шаблон.
+        return max(
+            (total for count, total in self.templates.values()),
+            default=0.0,
+        )
+
+    def add_query(self, sql, duration):
+        self.sql_count += 1
+        self.sql_time += duration
+        limit = settings.PROFILING_SLOW_QUERIES
+        if len(self.slow_queries) < limit:
+            self.slow_queries.append((duration, sql))
+            self.slow_queries.sort(reverse=True)
+        elif limit and duration > self.slow_queries[-1][0]:
+            self.slow_queries[-1] = (duration, sql)
+            self.slow_queries.sort(reverse=True)
+
+    def add_template(self, name, duration):
+        count, total = self.templates.get(name, (0, 0.0))
+        self.templates[name] = (count + 1, total + duration)
+
+    def server_timing(self):
+        """Значение заголовка Server-Timing в миллисекундах."""
+        return ', '.join((
+            f'total;dur={self.elapsed * 1000:.1f}',
+            f'sql;dur={self.sql_time * 1000:.1f};'
+            f'desc="{self.sql_count} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;desc="hit={self.cache_hits} miss={self.cache_misses}"',
+        ))
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.elapsed * 1000, 1),
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_time * 1000, 1),
+            'slow_queries': [
+                {'ms': round(duration * 1000, 1), 'sql': sql}
+                for duration, sql in self.slow_queries
+            ],
+            'templates': {
+                name: {'count': count, 'ms': round(total * 1000, 1)}
+                for name, (count, total) in self.templates.items()
+            },
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+def current():
+    """Возвращает счётчики текущего запроса или None."""
+    return getattr(_local, 'stats', None)
+
+
+@contextmanager
+def collect():
+    """
+    Включает сбор счётчиков для текущего потока.
+
+    Вложенные вызовы получают уже собираемый объект, поэтому профилировщик
+    и метрики могут работать одновременно.
+    """
+    stats = current()
+    if stats is not None:
+        yield stats
+        return
+    _local.stats = stats = RequestStats()
+    try:
+        yield stats
+    finally:
+        _local.stats = None
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    stats = current()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add_query(sql, time.perf_counter() - started)
+
+
+def _add_sql_wrapper(sender, connection, **kwargs):
+    if _sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_wrapper)
+
+
+def _patch_template_render():
+    original = Template.render
+
+    def render(self, context):
+        stats = current()
+        if stats is None:
+            return original(self, context)
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            stats.add_template(
+                self.name or '<string>', time.perf_counter() - started,
+            )
+
+    Template.render = render
+
+
+def instrument_cache(cache):
+    """Оборачивает `get` экземпляра кэша подсчётом попаданий и промахов."""
+    if getattr(cache, '_instrumented', False):
+        return
+    original = cache.get
+
+    def get(key, default=None, version=None):
+        value = original(key, default, version=version)
+        stats = current()
+        if stats is not None:
+            fragment = key.startswith(FRAGMENT_PREFIX)
+            if value is default:
+                stats.cache_misses += 1
+                stats.fragment_misses += fragment
+            else:
+                stats.cache_hits += 1
+                stats.fragment_hits += fragment
+        return value
+
+    cache.get = get
+    cache._instrumented = True
+
+
+def instrument_caches():
+    # Экземпляры кэшей создаются отдельно для каждого потока. Считается
+    # только кэш по умолчанию: составные бэкенды обращаются к другим
+    # псевдонимам, и обращение учитывалось бы дважды.
+    instrument_cache(caches[DEFAULT_CACHE_ALIAS])
+
+
+def install():
+    """Подключает обёртки SQL и шаблонов; вызывается один раз."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    connection_created.connect(_add_sql_wrapper)
+    for connection in connections.all():
+        _add_sql_wrapper(None, connection)
+    _patch_template_render()
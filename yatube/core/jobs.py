@@ -0,0 +1,180 @@
+"""
+Фоновые задачи в таблице базы данных.
+
+Задача — имя зарегистрированного обработчика и его параметры в JSON.
+Поставленная внутри транзакции задача видна обработчику только после
+её фиксации, поэтому брокер не нужен и отдельная синхронизация тоже.
+
+`run_worker` забирает задачи арендой: один `UPDATE ... WHERE` помечает
+свободные задачи своим токеном и временем окончания аренды, и две
+копии обработчика одну задачу не получат. Если процесс упал, задача
+освободится по истечении `JOB_LEASE` секунд. Успешная задача удаляется,
+неудачная повторяется с экспоненциальной паузой, пока не кончатся
+попытки.
+"""
+import json
+import logging
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import metrics
+from .models import Job
+
+logger = logging.getLogger('yatube')
+
+_handlers = {}
+
+
+def register(name):
+    """Регистрирует обработчик задач; параметры задачи — его аргументы."""
+    def decorator(func):
+        _handlers[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, dedup_key=None, delay=0, max_attempts=None, **payload):
+    """
+    Ставит задачу в очередь одним INSERT.
+
+    Пока в очереди есть задача с тем же `dedup_key`, новая молча
+    не ставится.
+    """
+    Job.objects.bulk_create([Job(
+        name=name,
+        payload=json.dumps(payload),
+        dedup_key=dedup_key,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )], ignore_conflicts=dedup_key is not None)
+
+
+def available(now):
+    """Задачи, которые пора выполнять и которые никто не арендовал."""
+    return Job.objects.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+        status=Job.QUEUED, run_at__lte=now,
+    )
+
+
+def claim(worker, limit):
+    """Арендует до `limit` задач; возвращает арендованные."""
+    now = timezone.now()
+    ids = list(available(now).order_by('run_at', 'pk').values_list(
+        'pk', flat=True,
+    )[:limit])
+    if not ids:
+        return []
+    token = f'{worker}:{uuid.uuid4().hex}'
+    # Условие повторяется в UPDATE: задачу, которую успел забрать
+    # другой обработчик, запрос не изменит.
+    available(now).filter(pk__in=ids).update(
+        locked_by=token,
+        locked_until=now + timedelta(seconds=settings.JOB_LEASE),
+        attempts=F('attempts') + 1,
+    )
+    return list(Job.objects.filter(locked_by=token))
+
+
+def backoff(attempts):
+    """Пауза перед попыткой номер `attempts + 1`."""
+    return min(settings.JOB_RETRY_BASE * 2 ** (attempts - 1),
+               settings.JOB_RETRY_MAX)
+
+
+def execute(job):
+    """Выполняет арендованную задачу; возвращает True при успехе."""
+    owned = Job.objects.filter(pk=job.pk, locked_by=job.locked_by)
+    try:
+        handler = _handlers.get(job.name)
+        if handler is None:
+            raise LookupError(f'Нет обработчика задачи {job.name}')
+        handler(**json.loads(job.payload))
+    except Exception as error:
+        logger.exception('Задача %s не выполнена, попытка %s из %s',
+                         job, job.attempts, job.max_attempts)
+        if job.attempts >= job.max_attempts:
+            owned.update(status=Job.FAILED, locked_until=None,
+                         last_error=repr(error))
+        else:
+            owned.update(
+                run_at=timezone.now() + timedelta(
+                    seconds=backoff(job.attempts)),
+                locked_by='', locked_until=None, last_error=repr(error),
+            )
+        return False
+    owned.delete()
+    return True
+
+
+def work_off(worker='inline', limit=100):
+    """Выполняет готовые задачи в текущем потоке; возвращает их число."""
+    done = 0
+    while True:
+        jobs = claim(worker, limit)
+        if not jobs:
+            return done
+        for job in jobs:
+            execute(job)
+            done += 1
+
+
+class Worker:
+    """Цикл, который арендует задачи и выполняет их в пуле потоков."""
+
+    def __init__(self, threads=None, poll_interval=None, name=None):
+        self.threads = threads or settings.JOB_WORKER_THREADS
+        self.poll_interval = poll_interval or settings.JOB_POLL_INTERVAL
+        self.name = name or f'worker-{uuid.uuid4().hex[:8]}'
+        self.stopping = threading.Event()
+
+    def stop(self):
+        self.stopping.set()
+
+    def _execute(self, job):
+        try:
+            return execute(job)
+        finally:
+            close_old_connections()
+
+    def _flush_metrics(self, force=False):
+        # Метрики задач, например время создания миниатюр, иначе
+        # остались бы в памяти процесса: MetricsMiddleware здесь нет.
+        if settings.METRICS_ENABLED:
+            metrics.flush(force)
+
+    def run(self, burst=False):
+        """
+        Выполняет задачи до `stop()`; возвращает число выполненных.
+
+        При `burst` останавливается, когда готовых задач не осталось.
+        """
+        done = 0
+        running = set()
+        with ThreadPoolExecutor(self.threads,
+                                thread_name_prefix=self.name) as pool:
+            while not self.stopping.is_set():
+                free = self.threads - len(running)
+                jobs = claim(self.name, free) if free else []
+                running.update(pool.submit(self._execute, job)
+                               for job in jobs)
+                if running:
+                    finished, running = wait(
+                        running, self.poll_interval, FIRST_COMPLETED,
+                    )
+                    done += len(finished)
+                elif burst:
+                    break
+                else:
+                    self.stopping.wait(self.poll_interval)
+                self._flush_metrics()
+            wait(running)
+        self._flush_metrics(force=True)
+        return done + len(running)
@@ -0,0 +1,30 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет фоновые задачи из таблицы задач. Можно запустить '
+        'несколько копий: задачи распределяются арендой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int,
+            help='Сколько задач выполнять одновременно.',
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выйти, когда готовых задач не останется.',
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(threads=options['threads'])
+        # Начатые задачи дорабатываются, новые не берутся.
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: worker.stop())
+        done = worker.run(burst=options['burst'])
+        self.stdout.write(f'Выполнено задач: {done}.')
@@ -0,0 +1,70 @@
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.slow_queries import fingerprint
+
+
+class Command(BaseCommand):
+    help = 'Сводка журнала медленных запросов по отпечаткам запросов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=10,
+            help='Сколько отпечатков вывести.',
+        )
+        parser.add_argument(
+            '--log', default=settings.SLOW_QUERY_LOG,
+            help='Путь к журналу медленных запросов.',
+        )
+
+    def read_groups(self, path):
+        """Сводит записи журнала по нормализованному тексту запроса."""
+        groups = defaultdict(lambda: {
+            'count': 0, 'total': 0.0, 'max': 0.0,
+            'views': set(), 'call_sites': set(), 'plan': None,
+        })
+        with open(path) as log:
+            for line in log:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                group = groups[fingerprint(record['sql'])]
+                group['count'] += 1
+                group['total'] += record['ms']
+                group['max'] = max(group['max'], record['ms'])
+                if record.get('view'):
+                    group['views'].add(record['view'])
+                if record.get('call_site'):
+                    group['call_sites'].add(record['call_site'])
+                group['plan'] = record.get('plan') or group['plan']
+        return groups
+
+    def handle(self, *args, **options):
+        try:
+            groups = self.read_groups(options['log'])
+        except FileNotFoundError:
+            raise CommandError(f'Журнал {options["log"]} не найден.')
+
+        top = sorted(
+            groups.items(), key=lambda item: item[1]['total'], reverse=True,
+        )[:options['top']]
+        for position, (sql, group) in enumerate(top, start=1):
+            self.stdout.write(
+                f'{position}. всего {group["total"]:.1f} мс, '
+                f'{group["count"]} раз, '
+                f'в среднем {group["total"] / group["count"]:.1f} мс, '
+                f'максимум {group["max"]:.1f} мс'
+            )
+            self.stdout.write(f'   {sql}')
+            if group['views']:
+                self.stdout.write(
+                    '   представления: ' + ', '.join(sorted(group['views'])))
+            if group['call_sites']:
+                self.stdout.write(
+                    '   вызовы: ' + ', '.join(sorted(group['call_sites'])))
+            for row in group['plan'] or ():
+                self.stdout.write(f'   план: {row}')
@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.db import apply_pragmas
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite при параллельных чтении '
+        'и записи с профилем SQLITE_PRODUCTION_PRAGMAS и без него.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--rows', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        for title, pragmas in (
+            ('без профиля', {}),
+            ('production', settings.SQLITE_PRODUCTION_PRAGMAS),
+        ):
+            result = self.run(pragmas, options)
+            seconds = options['seconds']
+            self.stdout.write(
+                f'{title}: чтений {result["reads"] / seconds:.0f}/с, '
+                f'записей {result["writes"] / seconds:.0f}/с, '
+                f'ошибок блокировки {result["locked"]}'
+            )
+
+    def connect(self, path, pragmas):
+        # Таймаут Django по умолчанию, чтобы сравнение было честным.
+        connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+        apply_pragmas(connection, pragmas)
+        return connection
+
+    def run(self, pragmas, options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.sqlite3')
+            setup = self.connect(path, pragmas)
+            setup.execute(
+                'CREATE TABLE post (id INTEGER PRIMARY KEY, '
+                'text TEXT, pub_date REAL)'
+            )
+            setup.execute('CREATE INDEX post_pub_date ON post (pub_date)')
+            setup.executemany(
+                'INSERT INTO post (text, pub_date) VALUES (?, ?)',
+                ((f'Пост {i}', i) for i in range(options['rows'])),
+            )
+            setup.close()
+
+            result = {'reads': 0, 'writes': 0, 'locked': 0}
+            lock = threading.Lock()
+            deadline = time.monotonic() + options['seconds']
+
+            def worker(write):
+                connection = self.connect(path, pragmas)
+                done = locked = 0
+                while time.monotonic() < deadline:
+                    try:
+                        if write:
+                            connection.execute('BEGIN IMMEDIATE')
+                            connection.execute(
+                                'INSERT INTO post (text, pub_date) '
+                                'VALUES (?, ?)', ('Новый пост', time.time()),
+                            )
+                            connection.execute('COMMIT')
+                        else:
+                            connection.execute(
+                                'SELECT id, text FROM post '
+                                'ORDER BY pub_date DESC LIMIT 10'
+                            ).fetchall()
+                        done += 1
+                    except sqlite3.OperationalError:
+                        locked += 1
+                        if connection.in_transaction:
+                            connection.execute('ROLLBACK')
+                connection.close()
+                with lock:
+                    result['writes' if write else 'reads'] += done
+                    result['locked'] += locked
+
+            threads = [
+                threading.Thread(target=worker, args=(False,))
+                for _ in range(options['readers'])
+            ] + [
+                threading.Thread(target=worker, args=(True,))
+                for _ in range(options['writers'])
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return result
@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+# Значение PRAGMA auto_vacuum для режима INCREMENTAL.
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+class Command(BaseCommand):
+    help = (
+        'Плановое обслуживание SQLite: контрольная точка WAL, ANALYZE '
+        'и инкрементальная очистка. Без флагов выполняет всё.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument(
+            '--checkpoint', action='store_true',
+            help='Перенести WAL в основной файл и обрезать журнал.',
+        )
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Обновить статистику планировщика запросов.',
+        )
+        parser.add_argument(
+            '--vacuum', action='store_true',
+            help='Вернуть свободные страницы файлу базы.',
+        )
+        parser.add_argument(
+            '--vacuum-pages', type=int, default=1000,
+            help='Сколько свободных страниц освобождать за запуск.',
+        )
+        parser.add_argument(
+            '--enable-incremental-vacuum', action='store_true',
+            help='Перевести базу в auto_vacuum=INCREMENTAL (полный VACUUM).',
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite.')
+        run_all = not any(
+            options[name] for name in (
+                'checkpoint', 'analyze', 'vacuum',
+                'enable_incremental_vacuum',
+            )
+        )
+        with connection.cursor() as cursor:
+            if options['enable_incremental_vacuum']:
+                cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                cursor.execute('VACUUM')
+                self.stdout.write('Включён auto_vacuum=INCREMENTAL.')
+            if run_all or options['checkpoint']:
+                cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                busy, log_pages, moved = cursor.fetchone()
+                self.stdout.write(
+                    f'Контрольная точка WAL: страниц журнала {log_pages}, '
+                    f'перенесено {moved}, занято {busy}.'
+                )
+            if run_all or options['analyze']:
+                cursor.execute('ANALYZE')
+                self.stdout.write('Статистика обновлена.')
+            if run_all or options['vacuum']:
+                cursor.execute('PRAGMA auto_vacuum')
+                if cursor.fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+                    self.stdout.write(
+                        'Инкрементальная очистка не включена, запустите '
+                        'команду с --enable-incremental-vacuum.'
+                    )
+                else:
+                    cursor.execute('PRAGMA freelist_count')
+                    free_pages = cursor.fetchone()[0]
+                    cursor.execute(
+                        'PRAGMA incremental_vacuum(%d)'
+                        % options['vacuum_pages']
+                    )
+                    cursor.fetchall()
+                    self.stdout.write(
+                        f'Освобождено страниц: '
+                        f'{min(free_pages, options["vacuum_pages"])}.'
+                    )
@@ -0,0 +1,197 @@
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+SIZE_BUCKETS = (
+    1024, 4096, 16384, 65536, 262144, 1048576,
+)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+METRICS = {
+    'yatube_request_duration_seconds': (
+        'histogram', 'Время обработки запроса.', LATENCY_BUCKETS,
+    ),
+    'yatube_response_size_bytes': (
+        'histogram', 'Размер тела ответа.', SIZE_BUCKETS,
+    ),
+    'yatube_db_queries': (
+        'histogram', 'Число SQL-запросов на запрос.', QUERY_BUCKETS,
+    ),
+    'yatube_fragment_cache_total': (
+        'counter', 'Обращения к кэшу фрагментов {% cache %}.', None,
+    ),
+    'yatube_thumbnail_duration_seconds': (
+        'histogram', 'Время создания миниатюры.', LATENCY_BUCKETS,
+    ),
+}
+
+_local = threading.local()
+_shards = []
+_shards_lock = threading.Lock()
+_started = int(time.time())
+_last_flush = 0.0
+
+
+def _shard():
+    """
+    Счётчики текущего потока.
+
+    Каждый поток пишет только в свой словарь, поэтому на горячем пути
+    блокировки не нужны; общий список шардов меняется только при появлении
+    нового потока.
+    """
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        shard = _local.shard = {}
+        with _shards_lock:
+            _shards.append(shard)
+    return shard
+
+
+def inc(name, value=1, **labels):
+    """Увеличивает счётчик."""
+    key = (name, tuple(sorted(labels.items())))
+    shard = _shard()
+    shard[key] = shard.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    """Добавляет наблюдение в гистограмму."""
+    key = (name, tuple(sorted(labels.items())))
+    shard = _shard()
+    buckets = METRICS[name][2]
+    sample = shard.get(key)
+    if sample is None:
+        # Счётчики корзин, затем сумма и общее число наблюдений.
+        sample = shard[key] = [0] * (len(buckets) + 2)
+    for index, bound in enumerate(buckets):
+        if value <= bound:
+            sample[index] += 1
+            break
+    sample[-2] += value
+    sample[-1] += 1
+
+
+def _merge(target, key, value):
+    if isinstance(value, list):
+        current = target.setdefault(key, [0] * len(value))
+        for index, item in enumerate(value):
+            current[index] += item
+    else:
+        target[key] = target.get(key, 0) + value
+
+
+def snapshot():
+    """Сводит счётчики всех потоков процесса."""
+    with _shards_lock:
+        shards = list(_shards)
+    merged = {}
+    for shard in shards:
+        # Копирование словаря и списков атомарно под GIL.
+        for key, value in shard.copy().items():
+            _merge(merged, key, list(value)
+                   if isinstance(value, list) else value)
+    return merged
+
+
+def _process_path():
+    return os.path.join(
+        settings.METRICS_DIR, f'{os.getpid()}-{_started}.json',
+    )
+
+
+def flush(force=False):
+    """
+    Сохраняет счётчики процесса в файл реестра.
+
+    Файл переписывается целиком через временный файл и `os.replace`,
+    поэтому читатель всегда видит согласованный снимок. Без `force`
+    запись выполняется не чаще `METRICS_FLUSH_INTERVAL` секунд.
+    """
+    global _last_flush
+    now = time.monotonic()
+    if not force and now - _last_flush < settings.METRICS_FLUSH_INTERVAL:
+        return
+    _last_flush = now
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = _process_path()
+    records = [
+        [name, list(labels), value]
+        for (name, labels), value in snapshot().items()
+    ]
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(records, file)
+    os.replace(tmp_path, path)
+
+
+def collect():
+    """Сводит снимки всех рабочих процессов из каталога реестра."""
+    merged = {}
+    if not os.path.isdir(settings.METRICS_DIR):
+        return merged
+    for filename in os.listdir(settings.METRICS_DIR):
+        if not filename.endswith('.json'):
+            continue
+        path = os.path.join(settings.METRICS_DIR, filename)
+        try:
+            with open(path) as file:
+                records = json.load(file)
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in records:
+            key = (name, tuple(tuple(label) for label in labels))
+            _merge(merged, key, value)
+    return merged
+
+
+def _format_labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    body = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', '\\\\').replace('"', '\\"'),
+        )
+        for name, value in pairs
+    )
+    return '{' + body + '}'
+
+
+def _format_bound(bound):
+    return repr(float(bound))
+
+
+def render(samples):
+    """Текстовый формат экспозиции Prometheus."""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for (sample_name, labels), value in sorted(samples.items()):
+            if sample_name != name:
+                continue
+            if kind == 'counter':
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, value):
+                cumulative += count
+                lines.append('{}_bucket{} {}'.format(
+                    name,
+                    _format_labels(labels, le=_format_bound(bound)),
+                    cumulative,
+                ))
+            lines.append('{}_bucket{} {}'.format(
+                name, _format_labels(labels, le='+Inf'), value[-1],
+            ))
+            lines.append(f'{name}_sum{_format_labels(labels)} {value[-2]}')
+            lines.append(f'{name}_count{_format_labels(labels)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
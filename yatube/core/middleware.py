@@ -0,0 +1,137 @@
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import instrumentation, metrics, routers, slow_queries
+
+logger = logging.getLogger('yatube.profiling')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Ключ сессии: до этого момента пользователь читает с основной базы.
+PRIMARY_UNTIL_SESSION_KEY = '_primary_until'
+
+
+class MetricsMiddleware:
+    """
+    Собирает метрики запросов для страницы /metrics.
+
+    Счётчики накапливаются в памяти процесса и периодически сбрасываются
+    в общий файловый реестр, откуда их сводит представление `metrics`.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        instrumentation.install()
+
+    def __call__(self, request):
+        instrumentation.instrument_caches()
+        with instrumentation.collect() as stats:
+            response = self.get_response(request)
+            elapsed = stats.elapsed
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        metrics.observe('yatube_request_duration_seconds', elapsed,
+                        view=view)
+        if not response.streaming:
+            metrics.observe('yatube_response_size_bytes',
+                            len(response.content), view=view)
+        metrics.observe('yatube_db_queries', stats.sql_count, view=view)
+        if stats.fragment_hits:
+            metrics.inc('yatube_fragment_cache_total',
+                        stats.fragment_hits, result='hit')
+        if stats.fragment_misses:
+            metrics.inc('yatube_fragment_cache_total',
+                        stats.fragment_misses, result='miss')
+        metrics.flush()
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует часть запросов: время ответа, SQL, шаблоны и кэш.
+
+    Включается настройкой `PROFILING_ENABLED`, доля профилируемых запросов
+    задаётся `PROFILING_SAMPLE_RATE`. Результат отдаётся в заголовке
+    Server-Timing и пишется одной строкой в лог `yatube.profiling`.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        instrumentation.install()
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        instrumentation.instrument_caches()
+        with instrumentation.collect() as stats:
+            response = self.get_response(request)
+            response['Server-Timing'] = stats.server_timing()
+            record = stats.as_dict()
+        record.update(
+            method=request.method,
+            path=request.path,
+            status=response.status_code,
+        )
+        logger.info(json.dumps(record, ensure_ascii=False))
+        return response
+
+
+class SlowQueryLogMiddleware:
+    """Сообщает журналу медленных запросов имя текущего представления."""
+
+    def __init__(self, get_response):
+        if settings.SLOW_QUERY_THRESHOLD_MS is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            slow_queries.set_view(None)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        slow_queries.set_view(request.resolver_match.view_name)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Разрешает безопасным запросам читать с реплики.
+
+    После запроса, который что-то записал в базу, сессия
+    на `REPLICA_READ_YOUR_WRITES` секунд закрепляется за основной базой,
+    чтобы пользователь сразу видел свои изменения, даже если реплика
+    отстаёт. Запись определяет роутер, а не метод: подписка и чтение
+    уведомлений пишут и в GET-запросах.
+    """
+
+    def __init__(self, get_response):
+        if settings.REPLICA_DATABASE is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        safe = request.method in SAFE_METHODS
+        routers.set_read_only(
+            safe
+            and request.session.get(PRIMARY_UNTIL_SESSION_KEY, 0) < time.time()
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.wrote()
+            routers.set_read_only(False)
+        if wrote:
+            request.session[PRIMARY_UNTIL_SESSION_KEY] = (
+                time.time() + settings.REPLICA_READ_YOUR_WRITES
+            )
+        return response
@@ -0,0 +1,47 @@
+from django.db import models
+from django.db.models import Q, UniqueConstraint
+from django.utils import timezone
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Обработчик', max_length=100)
+    payload = models.TextField('Параметры (JSON)', default='{}')
+    dedup_key = models.CharField(
+        'Ключ дедупликации', max_length=200, blank=True, null=True,
+    )
+    status = models.CharField(
+        'Состояние', max_length=16, choices=STATUSES, default=QUEUED,
+    )
+    run_at = models.DateTimeField('Запустить не раньше', default=timezone.now)
+    locked_by = models.CharField('Обработчик аренды', max_length=100,
+                                 blank=True)
+    locked_until = models.DateTimeField('Аренда до', blank=True, null=True)
+    attempts = models.PositiveIntegerField('Попытки', default=0)
+    max_attempts = models.PositiveIntegerField('Предел попыток', default=5)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'фоновые задачи'
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_due'),
+        ]
+        constraints = [
+            # Ключ уникален только среди задач в очереди: после
+            # выполнения или ошибки такую же задачу можно поставить снова.
+            UniqueConstraint(
+                fields=['dedup_key'], condition=Q(status='queued'),
+                name='unique_queued_job',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,49 @@
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_local = threading.local()
+
+
+def set_read_only(value):
+    """Разрешает потоку читать с реплики и сбрасывает отметку записи."""
+    _local.read_only = value
+    _local.wrote = False
+
+
+def wrote():
+    """Была ли запись в основную базу с последнего `set_read_only`."""
+    return getattr(_local, 'wrote', False)
+
+
+class ReplicaRouter:
+    """
+    Направляет чтение на реплику `REPLICA_DATABASE`, запись — на основную.
+
+    Читать с реплики можно только внутри запроса, который
+    `ReplicaRoutingMiddleware` признал безопасным, вне транзакции
+    и до первой записи: транзакция и всё после записи читают с основной
+    базы. Запись отмечается, чтобы middleware закрепил сессию даже
+    за GET-запросом, который что-то изменил.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            settings.REPLICA_DATABASE is None
+            or not getattr(_local, 'read_only', False)
+            or wrote()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return settings.REPLICA_DATABASE
+
+    def db_for_write(self, model, **hints):
+        _local.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+
+from django.conf import settings
+
+logger = logging.getLogger('yatube.slow_queries')
+
+_local = threading.local()
+
+# Обёртки запросов, шаблонов и представлений, а не места вызова.
+_WRAPPER_FILES = {
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    for name in (
+        'decorators.py', 'instrumentation.py', 'middleware.py',
+        'slow_queries.py',
+    )
+}
+
+
+def set_view(view_name):
+    """Запоминает представление, из которого идут запросы потока."""
+    _local.view = view_name
+
+
+def _call_site():
+    """Последний кадр стека из кода проекта, а не Django или библиотек."""
+    for frame in reversed(traceback.extract_stack()[:-3]):
+        filename = os.path.abspath(frame.filename)
+        if (
+            filename.startswith(settings.BASE_DIR)
+            and filename not in _WRAPPER_FILES
+            and 'site-packages' not in filename
+        ):
+            return f'{filename[len(settings.BASE_DIR) + 1:]}:{frame.lineno}'
+    return None
+
+
+def _is_select(sql):
+    return sql.lstrip().upper().startswith('SELECT')
+
+
+def _explain(connection, sql, params):
+    _local.explaining = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{connection.ops.explain_query_prefix()} {sql}', params,
+            )
+            return [' '.join(map(str, row)) for row in cursor.fetchall()]
+    except Exception as error:
+        return [f'EXPLAIN не выполнен: {error}']
+    finally:
+        _local.explaining = False
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold is None or getattr(_local, 'explaining', False):
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = (time.perf_counter() - started) * 1000
+        if duration >= threshold:
+            # Параметры записи не сохраняются: в них бывают хеши паролей
+            # и другие личные данные.
+            select = not many and _is_select(sql)
+            record = {
+                'ms': round(duration, 2),
+                'sql': sql,
+                'params': params if select else None,
+                'view': getattr(_local, 'view', None),
+                'call_site': _call_site(),
+                'plan': _explain(
+                    context['connection'], sql, params,
+                ) if select else None,
+            }
+            logger.warning(json.dumps(record, ensure_ascii=False,
+                                      default=str))
+
+
+def add_slow_query_wrapper(sender, connection, **kwargs):
+    """Подключает журнал медленных запросов к основной базе данных."""
+    if (
+        connection.alias == 'default'
+        and slow_query_wrapper not in connection.execute_wrappers
+    ):
+        connection.execute_wrappers.append(slow_query_wrapper)
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'IN \((?:\?, )*\?\)', re.IGNORECASE)
+_SPACES = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Нормализует запрос: литералы и параметры заменяются на `?`."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACES.sub(' ', sql).strip()
@@ -0,0 +1,15 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core import fragments
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def user_fragment(context, name, **params):
+    """Фрагмент страницы, который зависит от текущего пользователя."""
+    return mark_safe(fragments.render(
+        context['request'], name,
+        {key: str(value) for key, value in params.items()},
+    ))
@@ -0,0 +1,45 @@
+"""Окружение тестов: свои каталоги кэша и метрик во временном каталоге."""
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+@contextmanager
+def private_storage():
+    """Подменяет каталоги файловых кэшей и метрик временным."""
+    location = tempfile.mkdtemp(prefix='yatube_test_')
+    caches = {alias: dict(params) for alias, params in settings.CACHES.items()}
+    for alias, params in caches.items():
+        if params['BACKEND'].endswith('FileBasedCache'):
+            params['LOCATION'] = os.path.join(location, alias)
+    try:
+        with override_settings(
+            CACHES=caches,
+            METRICS_DIR=os.path.join(location, 'metrics'),
+        ):
+            yield location
+    finally:
+        shutil.rmtree(location, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Запускает тесты со своими кэшем и метриками.
+
+    Тесты очищают кэш и пишут метрики, и общие с сервером разработки
+    каталоги теряли бы его данные.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._private_storage = private_storage()
+        self._private_storage.__enter__()
+
+    def teardown_test_environment(self, **kwargs):
+        self._private_storage.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)
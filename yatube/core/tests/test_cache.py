@@ -0,0 +1,58 @@
+from django.core.cache import caches
+from django.test import SimpleTestCase
+
+from core.cache import LocalTier, TwoTierCache
+
+
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.shared = caches['shared']
+        self.shared.clear()
+        params = {'OPTIONS': {'SYNC_INTERVAL': 0}}
+        self.first = TwoTierCache('shared', params)
+        # Второй экземпляр со своим локальным уровнем — другой процесс.
+        self.second = TwoTierCache('shared', params)
+        self.second._tier = LocalTier(1000)
+
+    def test_hot_key_served_from_memory(self):
+        """Прочитанный ключ отдаётся из памяти без обращения к общему кэшу."""
+        self.first.set('group', 'Тестовая группа')
+        self.assertEqual(self.second.get('group'), 'Тестовая группа')
+        self.shared.delete('group')
+        self.assertEqual(self.second.get('group'), 'Тестовая группа')
+
+    def test_delete_invalidates_other_processes(self):
+        """Удаление в одном процессе сбрасывает локальный уровень других."""
+        self.first.set('group', 'Тестовая группа')
+        self.second.get('group')
+        self.first.delete('group')
+        self.assertIsNone(self.second.get('group'))
+
+    def test_delete_keeps_other_hot_keys(self):
+        """Удаление ключа не вытесняет из памяти других процессов прочие."""
+        self.first.set('group', 'Тестовая группа')
+        self.first.set('user', 'Автор')
+        self.second.get('group')
+        self.second.get('user')
+        self.shared.set('user', 'Другой автор')
+        self.first.delete('group')
+        self.assertIsNone(self.second.get('group'))
+        self.assertEqual(self.second.get('user'), 'Автор')
+
+    def test_clear_invalidates_other_processes(self):
+        """Очистка общего кэша сбрасывает локальный уровень других."""
+        self.first.set('group', 'Тестовая группа')
+        self.first.delete('user')
+        self.second.get('group')
+        self.first.clear()
+        self.assertIsNone(self.second.get('group'))
+
+    def test_local_tier_is_bounded(self):
+        """Локальный уровень вытесняет давно не использованные ключи."""
+        tier = LocalTier(max_entries=2)
+        tier.set('a', 1, 60)
+        tier.set('b', 2, 60)
+        tier.get('a')
+        tier.set('c', 3, 60)
+        self.assertIsNone(tier.get('b'))
+        self.assertEqual(tier.get('a'), 1)
@@ -0,0 +1,131 @@
+from concurrent.futures import Future
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job
+from posts.counters import post_views
+from posts.models import Follow, Notification, Post
+
+User = get_user_model()
+
+calls = []
+
+
+@jobs.register('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@jobs.register('tests.fail')
+def fail():
+    raise RuntimeError('сбой')
+
+
+class InlineExecutor:
+    """Пул, выполняющий задачи сразу в вызывающем потоке."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, func, *args):
+        future = Future()
+        future.set_result(func(*args))
+        return future
+
+
+@override_settings(JOB_RETRY_BASE=10, JOB_MAX_ATTEMPTS=2)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_work_off(self):
+        """Задача выполняется с параметрами и удаляется из очереди."""
+        jobs.enqueue('tests.record', value=1)
+        jobs.enqueue('tests.record', value=2, delay=60)
+        self.assertEqual(jobs.work_off(), 1)
+        self.assertEqual(calls, [1])
+        self.assertEqual(Job.objects.get().payload, '{"value": 2}')
+
+    def test_deduplication(self):
+        """Пока задача в очереди, такая же по ключу не ставится."""
+        for _ in range(2):
+            jobs.enqueue('tests.fail', dedup_key='fail')
+        self.assertEqual(Job.objects.count(), 1)
+        Job.objects.update(status=Job.FAILED)
+        jobs.enqueue('tests.fail', dedup_key='fail')
+        self.assertEqual(Job.objects.filter(status=Job.QUEUED).count(), 1)
+
+    def test_claim_skips_leased_jobs(self):
+        """Арендованную задачу не получит другой обработчик до конца аренды."""
+        jobs.enqueue('tests.record', value=1)
+        self.assertEqual(len(jobs.claim('first', 10)), 1)
+        self.assertEqual(jobs.claim('second', 10), [])
+        Job.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        job, = jobs.claim('second', 10)
+        self.assertEqual(job.attempts, 2)
+
+    def test_retry_with_backoff(self):
+        """Ошибка откладывает задачу, после последней попытки — отказ."""
+        jobs.enqueue('tests.fail')
+        with self.assertLogs('yatube', 'ERROR'):
+            self.assertEqual(jobs.work_off(), 1)
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=9))
+        self.assertIn('сбой', job.last_error)
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('yatube', 'ERROR'):
+            jobs.work_off()
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+
+    def test_worker_runs_jobs_in_pool(self):
+        """Обработчик в режиме burst выполняет задачи и выходит."""
+        for value in range(3):
+            jobs.enqueue('tests.record', value=value)
+        # Потоки пула не видят транзакцию теста, поэтому задачи
+        # выполняются в текущем потоке.
+        with mock.patch('core.jobs.ThreadPoolExecutor', InlineExecutor), \
+                mock.patch('core.metrics.flush') as flush:
+            self.assertEqual(jobs.Worker(threads=2).run(burst=True), 3)
+        self.assertEqual(sorted(calls), [0, 1, 2])
+        # Метрики задач сохраняются и при выходе обработчика.
+        flush.assert_called_with(True)
+
+
+class BackgroundWorkTests(TestCase):
+    def test_new_post_fans_out_in_worker(self):
+        """Рассылка о новой записи выполняется фоновой задачей один раз."""
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=author)
+        post = Post.objects.create(text='Запись', author=author)
+        self.assertFalse(Notification.objects.exists())
+        jobs.work_off()
+        # Повтор задачи не дублирует уведомления.
+        jobs.enqueue('posts.fan_out_post', post_id=post.pk)
+        jobs.work_off()
+        self.assertEqual(Notification.objects.get().recipient, reader)
+
+    def test_counter_is_written_by_job(self):
+        """Из запроса приращения счётчика уходят в задачу одной вставкой."""
+        post = Post.objects.create(
+            text='Запись', author=User.objects.create_user(username='a'),
+        )
+        post_views.pending.clear()
+        post_views.add(post.pk, 3)
+        with self.assertNumQueries(1):
+            post_views.flush_later()
+        self.assertEqual(Post.objects.get(pk=post.pk).views, 0)
+        jobs.work_off()
+        self.assertEqual(Post.objects.get(pk=post.pk).views, 3)
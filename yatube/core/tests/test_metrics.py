@@ -0,0 +1,55 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+TEMP_METRICS_DIR = tempfile.mkdtemp()
+
+
+@override_settings(METRICS_DIR=TEMP_METRICS_DIR)
+class MetricsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_METRICS_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_metrics_exposition(self):
+        """Страница /metrics отдаёт гистограммы по имени адреса."""
+        self.guest_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('metrics'))
+        self.assertEqual(
+            response['Content-Type'],
+            'text/plain; version=0.0.4; charset=utf-8',
+        )
+        text = response.content.decode()
+        for line in (
+            '# TYPE yatube_request_duration_seconds histogram',
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"}',
+            'yatube_response_size_bytes_count{view="posts:index"}',
+            'yatube_db_queries_sum{view="posts:index"}',
+            'yatube_fragment_cache_total{result="miss"}',
+        ):
+            with self.subTest(line=line):
+                self.assertIn(line, text)
+
+    def test_metrics_from_other_workers(self):
+        """Счётчики других рабочих процессов суммируются."""
+        records = [[
+            'yatube_fragment_cache_total', [['result', 'hit']], 1000,
+        ]]
+        with open(os.path.join(TEMP_METRICS_DIR, '0-0.json'), 'w') as file:
+            json.dump(records, file)
+        response = self.guest_client.get(reverse('metrics'))
+        self.assertRegex(
+            response.content.decode(),
+            r'yatube_fragment_cache_total\{result="hit"\} 10\d\d',
+        )
@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0)
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def test_server_timing_header(self):
+        """Профилируемый ответ содержит заголовок Server-Timing."""
+        with self.assertLogs('yatube.profiling', level='INFO') as logs:
+            response = Client().get(
+                reverse('posts:profile', kwargs={'username': 'author'}),
+            )
+        timing = response['Server-Timing']
+        for metric in ('total;dur=', 'sql;dur=', 'tpl;dur=', 'cache;desc='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, timing)
+        self.assertIn('"sql_count": 5', logs.output[0])
+        self.assertIn('posts/profile.html', logs.output[0])
+
+    @override_settings(PROFILING_SAMPLE_RATE=0.0)
+    def test_not_sampled_request(self):
+        """Запрос вне выборки не профилируется."""
+        response = Client().get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
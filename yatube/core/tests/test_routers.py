@@ -0,0 +1,81 @@
+import time
+
+from django.db import transaction
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.middleware import PRIMARY_UNTIL_SESSION_KEY, ReplicaRoutingMiddleware
+from core.routers import ReplicaRouter, set_read_only
+from posts.models import Post
+
+
+@override_settings(REPLICA_DATABASE='replica')
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def route(self, request, write=False):
+        """Возвращает базу, выбранную для чтения внутри запроса."""
+        # TestCase держит транзакцию открытой, поэтому закрепление
+        # за основной базой проверяется отдельно.
+        def view(request):
+            if write:
+                self.router.db_for_write(Post)
+            request.routed_to = self.router.db_for_read(Post)
+            return None
+
+        connection = transaction.get_connection()
+        atomic = connection.in_atomic_block
+        connection.in_atomic_block = False
+        try:
+            ReplicaRoutingMiddleware(view)(request)
+        finally:
+            connection.in_atomic_block = atomic
+        return request.routed_to
+
+    def make_request(self, method='get', session=None):
+        request = getattr(self.factory, method)('/')
+        request.session = session if session is not None else {}
+        return request
+
+    def test_get_reads_from_replica(self):
+        """Безопасный запрос читает с реплики."""
+        self.assertEqual(self.route(self.make_request()), 'replica')
+
+    def test_post_reads_from_primary(self):
+        """Запрос на запись читает с основной базы и закрепляет сессию."""
+        request = self.make_request('post')
+        self.assertEqual(self.route(request, write=True), 'default')
+        self.assertGreater(
+            request.session[PRIMARY_UNTIL_SESSION_KEY], time.time(),
+        )
+
+    def test_get_with_write_pins_session(self):
+        """GET, который записал в базу, дальше читает с основной базы."""
+        request = self.make_request()
+        self.assertEqual(self.route(request, write=True), 'default')
+        self.assertGreater(
+            request.session[PRIMARY_UNTIL_SESSION_KEY], time.time(),
+        )
+
+    def test_request_without_writes_does_not_pin(self):
+        """Запрос без записи не закрепляет сессию, каким бы ни был метод."""
+        for method in ('get', 'post'):
+            request = self.make_request(method)
+            self.route(request)
+            self.assertNotIn(PRIMARY_UNTIL_SESSION_KEY, request.session)
+
+    def test_read_your_writes_window(self):
+        """После записи сессия какое-то время читает с основной базы."""
+        session = {PRIMARY_UNTIL_SESSION_KEY: time.time() + 10}
+        self.assertEqual(self.route(self.make_request(session=session)),
+                         'default')
+
+    def test_transaction_pinned_to_primary(self):
+        """Внутри транзакции чтение идёт с основной базы."""
+        set_read_only(True)
+        try:
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        finally:
+            set_read_only(False)
+        self.assertEqual(self.router.db_for_write(Post), 'default')
@@ -0,0 +1,63 @@
+import json
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.slow_queries import fingerprint
+from posts.models import Post
+
+User = get_user_model()
+
+
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_query_record(self):
+        """Медленный запрос пишется в журнал с планом и представлением."""
+        with self.assertLogs('yatube.slow_queries') as logs:
+            Client().get(reverse('posts:index'))
+        records = [json.loads(line.split(':', 2)[2]) for line in logs.output]
+        feed = [
+            record for record in records
+            if 'FROM "posts_post"' in record['sql']
+            and 'COUNT' not in record['sql']
+        ][0]
+        self.assertEqual(feed['view'], 'posts:index')
+        self.assertTrue(feed['call_site'].startswith('posts/'))
+        self.assertTrue(feed['plan'])
+        self.assertIsNotNone(feed['params'])
+
+    def test_fingerprint(self):
+        """Запросы с разными параметрами дают один отпечаток."""
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (1, 2, 3) AND a = 'x'"),
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s) AND a = %s"),
+        )
+
+    def test_report_command(self):
+        """Команда сводит журнал по отпечаткам."""
+        with tempfile.NamedTemporaryFile('w', suffix='.log') as log:
+            for post_id in (1, 2):
+                log.write(json.dumps({
+                    'ms': 150.0,
+                    'sql': f'SELECT * FROM posts_post WHERE id = {post_id}',
+                    'view': 'posts:post_detail',
+                    'call_site': 'posts/views.py:40',
+                    'plan': ['SEARCH TABLE posts_post'],
+                }) + '\n')
+            log.flush()
+            out = StringIO()
+            call_command('slow_query_report', log=log.name, stdout=out)
+        report = out.getvalue()
+        self.assertIn('всего 300.0 мс, 2 раз', report)
+        self.assertIn('SELECT * FROM posts_post WHERE id = ?', report)
+        self.assertIn('posts:post_detail', report)
@@ -0,0 +1,23 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from core.db import configure_sqlite
+
+
+class SQLiteProfileTests(TestCase):
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -4096})
+    def test_pragmas_applied_on_connection(self):
+        """Профиль SQLite применяется к соединению."""
+        configure_sqlite(sender=None, connection=connection)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -4096)
+
+    def test_sqlite_maintenance_command(self):
+        """Команда обслуживания обновляет статистику SQLite."""
+        out = StringIO()
+        call_command('sqlite_maintenance', analyze=True, stdout=out)
+        self.assertIn('Статистика обновлена.', out.getvalue())
@@ -1,5 +1,8 @@
+from django.http import HttpResponse
 from django.shortcuts import render
 
+from . import metrics as registry
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -11,3 +14,12 @@ def csrf_failure(request, reason=''):
 
 def server_error(request, reason=''):
     return render(request, 'core/500.html')
+
+
+def metrics(request):
+    """Метрики всех рабочих процессов в формате Prometheus."""
+    registry.flush(force=True)
+    return HttpResponse(
+        registry.render(registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -5,3 +5,7 @@ class PostsConfig(AppConfig):
     name = 'posts'
     verbose_name = 'сообщение'
     verbose_name_plural = 'сообщения'
+
+    def ready(self):
+        from . import (counters, digests, fragments,  # noqa: F401
+                       notifications, signals, thumbnails)
@@ -0,0 +1,50 @@
+from functools import wraps
+
+from django.conf import settings
+
+from core.counters import BufferedCounter
+
+from .models import Comment, EngagementEvent, Post
+
+
+def engagement_recorder(kind):
+    """Передаёт положительные приращения в буфер популярного."""
+    def record(pending):
+        # Запись могли удалить, пока приращения копились в памяти.
+        existing = Post.objects.filter(
+            pk__in=[pk for pk, value in pending.items() if value > 0],
+        ).values_list('pk', flat=True)
+        EngagementEvent.objects.bulk_create(
+            EngagementEvent(post_id=pk, kind=kind, count=pending[pk])
+            for pk in existing
+        )
+    return record
+
+
+def buffered_counter(model, field, on_flush=None):
+    return BufferedCounter(
+        model, field,
+        flush_interval=settings.COUNTER_FLUSH_INTERVAL,
+        max_pending=settings.COUNTER_MAX_PENDING,
+        on_flush=on_flush,
+    )
+
+
+post_views = buffered_counter(
+    Post, 'views', engagement_recorder(EngagementEvent.VIEW),
+)
+post_reactions = buffered_counter(
+    Post, 'reactions_count', engagement_recorder(EngagementEvent.REACTION),
+)
+comment_reactions = buffered_counter(Comment, 'reactions_count')
+
+
+def count_view(view_func):
+    """Считает просмотр записи, в том числе из кэша и ответом 304."""
+    @wraps(view_func)
+    def wrapper(request, post_id, *args, **kwargs):
+        response = view_func(request, post_id, *args, **kwargs)
+        if request.method == 'GET' and response.status_code in (200, 304):
+            post_views.add(post_id)
+        return response
+    return wrapper
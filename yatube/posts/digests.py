@@ -0,0 +1,149 @@
+"""
+Рассылка подборок новых записей от авторов из подписок.
+
+Пары «подписчик — запись» читаются одним потоковым запросом,
+упорядоченным по подписчику, и группируются по ходу чтения, поэтому
+память ограничена одной пачкой подписчиков. Тексты записей пачки
+загружаются одним запросом, и каждая запись рендерится один раз на
+пачку, сколько бы подписчиков её ни получили. Письма уходят через одно
+открытое соединение частями; после каждой части для её получателей
+сохраняется время публикации последней отправленной записи, и повторный
+запуск их не повторяет. Отметка ставится по `pub_date`, а не по id:
+запланированная запись создаётся раньше, чем публикуется.
+"""
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import DateTimeField, F, OuterRef, Q, Subquery
+from django.template.loader import get_template
+from django.utils import timezone
+
+from core import jobs
+
+from .models import DigestLog, Follow, Post
+
+PERIODS = {
+    DigestLog.DAILY: (timedelta(days=1), 'Новые записи за день'),
+    DigestLog.WEEKLY: (timedelta(weeks=1), 'Новые записи за неделю'),
+}
+
+
+def digest_rows(period, since):
+    """
+    Поток (id, имя, почта подписчика, id записи, время публикации).
+
+    Записи каждого подписчика идут от новых к старым и начинаются после
+    последней отправленной ему в этом периоде.
+    """
+    checkpoint = DigestLog.objects.filter(
+        user=OuterRef('user_id'), period=period,
+    ).values('last_published')[:1]
+    return Follow.objects.exclude(user__email='').annotate(
+        checkpoint=Subquery(checkpoint, output_field=DateTimeField()),
+    ).filter(
+        Q(checkpoint__isnull=True)
+        | Q(author__posts__pub_date__gt=F('checkpoint')),
+        author__posts__is_published=True,
+        author__posts__pub_date__gte=since,
+    ).order_by(
+        'user_id', '-author__posts__pub_date', '-author__posts__pk',
+    ).values_list(
+        'user_id', 'user__username', 'user__email', 'author__posts__pk',
+        'author__posts__pub_date',
+    ).iterator(chunk_size=settings.DIGEST_BATCH_SIZE)
+
+
+def digest_batches(rows):
+    """
+    Пачки подписчиков.
+
+    Подписчик — (id, имя, почта, id записей, всего записей, время
+    публикации самой новой из них).
+    """
+    batch = []
+    for (user_id, username, email), user_rows in groupby(
+        rows, key=lambda row: row[:3],
+    ):
+        user_rows = list(user_rows)
+        post_ids = [row[3] for row in user_rows]
+        batch.append((user_id, username, email,
+                      post_ids[:settings.DIGEST_MAX_POSTS], len(post_ids),
+                      user_rows[0][4]))
+        if len(batch) >= settings.DIGEST_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def render_posts(post_ids):
+    """Текст каждой записи пачки, отрендеренный один раз."""
+    template = get_template('posts/email/digest_post.txt')
+    posts = Post.objects.select_related('author', 'group').in_bulk(post_ids)
+    return {
+        pk: template.render({'post': post, 'site_url': settings.SITE_URL})
+        for pk, post in posts.items()
+    }
+
+
+def save_checkpoints(period, last_published):
+    """Запоминает публикацию последней отправленной записи получателей."""
+    now = timezone.now()
+    with transaction.atomic():
+        existing = {
+            log.user_id: log for log in DigestLog.objects.filter(
+                period=period, user_id__in=list(last_published),
+            )
+        }
+        for user_id, log in existing.items():
+            log.last_published = last_published[user_id]
+            log.sent = now
+        DigestLog.objects.bulk_update(
+            existing.values(), ['last_published', 'sent'],
+        )
+        DigestLog.objects.bulk_create([
+            DigestLog(user_id=user_id, period=period,
+                      last_published=published, sent=now)
+            for user_id, published in last_published.items()
+            if user_id not in existing
+        ])
+
+
+@jobs.register('posts.send_digests')
+def send_digests(period, connection=None):
+    """Рассылает подборки за период; возвращает число отправленных писем."""
+    window, subject = PERIODS[period]
+    since = timezone.now() - window
+    template = get_template('posts/email/digest.txt')
+    chunk_size = settings.DIGEST_SEND_CHUNK
+    connection = connection or get_connection()
+    sent = 0
+    connection.open()
+    try:
+        for batch in digest_batches(digest_rows(period, since)):
+            rendered = render_posts(
+                {pk for *_, post_ids, _, _ in batch for pk in post_ids},
+            )
+            for start in range(0, len(batch), chunk_size):
+                messages, last_published = [], {}
+                for (user_id, username, email, post_ids, total,
+                     published) in batch[start:start + chunk_size]:
+                    posts = [rendered[pk] for pk in post_ids if pk in rendered]
+                    body = template.render({
+                        'username': username,
+                        'posts': posts,
+                        'more': total - len(posts),
+                        'site_url': settings.SITE_URL,
+                    })
+                    messages.append(EmailMessage(
+                        subject, body, to=[email], connection=connection,
+                    ))
+                    last_published[user_id] = published
+                sent += connection.send_messages(messages) or 0
+                save_checkpoints(period, last_published)
+    finally:
+        connection.close()
+    return sent
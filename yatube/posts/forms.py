@@ -1,4 +1,6 @@
 from django import forms
+from django.conf import settings
+from django.utils import timezone
 
 from .models import Comment, Post
 
@@ -15,7 +17,47 @@ class PostForm(forms.ModelForm):
         }
 
 
+class ScheduleForm(forms.Form):
+    """Время публикации; отдельно от PostForm, у которой три поля."""
+
+    publish_at = forms.DateTimeField(
+        label='Опубликовать',
+        help_text='Оставьте пустым, чтобы опубликовать сразу',
+        required=False,
+        input_formats=['%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M'],
+        widget=forms.DateTimeInput(
+            attrs={'type': 'datetime-local'}, format='%Y-%m-%dT%H:%M',
+        ),
+    )
+
+    def clean_publish_at(self):
+        publish_at = self.cleaned_data['publish_at']
+        if publish_at is not None and publish_at <= timezone.now():
+            raise forms.ValidationError('Время публикации уже прошло.')
+        return publish_at
+
+
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
+
+
+class BulkFollowForm(forms.Form):
+    usernames = forms.CharField(
+        label='Авторы',
+        help_text='Имена пользователей через запятую или пробел',
+    )
+    unfollow = forms.BooleanField(label='Отписаться', required=False)
+
+    def clean_usernames(self):
+        usernames = {
+            username
+            for username in self.cleaned_data['usernames'].replace(
+                ',', ' ').split()
+        }
+        if len(usernames) > settings.BULK_FOLLOW_LIMIT:
+            raise forms.ValidationError(
+                f'Не больше {settings.BULK_FOLLOW_LIMIT} авторов за раз.'
+            )
+        return usernames
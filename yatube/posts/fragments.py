@@ -0,0 +1,111 @@
+from django.template.loader import render_to_string
+
+from core import fragments
+
+from .forms import CommentForm
+from .models import REACTION_KINDS, Bookmark, Post
+from .notifications import unread_count
+from .reactions import reaction_states
+from .utils import following_authors
+
+fragments.register_template('switcher', 'posts/includes/switcher.html')
+
+
+@fragments.register('header')
+def headers(request, params_list):
+    """Шапка сайта с числом непрочитанных уведомлений."""
+    unread = (
+        unread_count(request.user.pk) if request.user.is_authenticated
+        else 0
+    )
+    return [
+        render_to_string('includes/header.html', {**params, 'unread': unread},
+                         request)
+        for params in params_list
+    ]
+
+
+@fragments.register('comment_form')
+def comment_forms(request, params_list):
+    """Форма комментария: зависит от пользователя и токена CSRF."""
+    return [
+        render_to_string('posts/includes/comment_form.html', {
+            'post_id': params['post'],
+            'parent_id': params.get('parent'),
+            'form': CommentForm(),
+        }, request)
+        for params in params_list
+    ]
+
+
+@fragments.register('bookmark')
+def bookmarks(request, params_list):
+    """Кнопки закладок: состояние для всех записей страницы одним запросом."""
+    if not request.user.is_authenticated:
+        return [''] * len(params_list)
+    saved = set(Bookmark.objects.filter(
+        user=request.user,
+        post_id__in={int(params['post']) for params in params_list},
+    ).values_list('post_id', flat=True))
+    return [
+        render_to_string('posts/includes/bookmark.html', {
+            'post_id': params['post'],
+            'saved': int(params['post']) in saved,
+        }, request)
+        for params in params_list
+    ]
+
+
+@fragments.register('follow_button')
+def follow_buttons(request, params_list):
+    """Кнопки подписки: состояние для всех авторов одним запросом."""
+    following = following_authors(
+        request, {int(params['author_id']) for params in params_list},
+    )
+    return [
+        render_to_string('posts/includes/follow_button.html', {
+            'author_username': params['author'],
+            'following': int(params['author_id']) in following,
+        }, request)
+        for params in params_list
+    ]
+
+
+@fragments.register('reactions')
+def reactions(request, params_list):
+    """Реакции под записями и комментариями: два запроса на вид объекта."""
+    ids = {}
+    for params in params_list:
+        ids.setdefault(params['target'], set()).add(int(params['id']))
+    states = {
+        target: reaction_states(request.user, target, target_ids)
+        for target, target_ids in ids.items()
+    }
+    rendered = []
+    for params in params_list:
+        count, mine = states[params['target']][int(params['id'])]
+        rendered.append(render_to_string('posts/includes/reactions.html', {
+            'target': params['target'],
+            'target_id': params['id'],
+            'count': count,
+            'mine': mine,
+            'kinds': REACTION_KINDS,
+        }, request))
+    return rendered
+
+
+@fragments.register('views', volatile=True)
+def view_counts(request, params_list):
+    """
+    Число просмотров записи.
+
+    Счётчик меняется без изменения записи, поэтому не хранится ни в теле
+    страницы, ни в готовой странице для гостей. Показывается записанное
+    в базу значение: оно отстаёт не больше чем на интервал сброса
+    счётчика, зато страница не меняется от каждого просмотра и ETag
+    остаётся действительным между сбросами.
+    """
+    stored = dict(Post.objects.filter(
+        pk__in={int(params['post']) for params in params_list},
+    ).values_list('pk', 'views'))
+    return [str(stored.get(int(params['post']), 0)) for params in params_list]
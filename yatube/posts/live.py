@@ -0,0 +1,160 @@
+"""
+Новые комментарии в реальном времени.
+
+О новом комментарии сообщает номер версии записи в кэше. Все открытые
+потоки процесса ждут на одном условии, а общий кэш опрашивает один
+фоновый поток: раз в `COMMENT_STREAM_POLL` секунд он читает версии всех
+наблюдаемых записей одним `get_many` и будит потоки тех записей, где
+версия сменилась. Простаивающие соединения не обращаются ни к базе,
+ни к кэшу.
+"""
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Comment
+
+COMMENTS_VERSION_KEY = 'posts:comments_version:{}'
+# Максимум комментариев в одном ответе ленты.
+BATCH_SIZE = 100
+
+
+def bump_comments_version(post_id):
+    key = COMMENTS_VERSION_KEY.format(post_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def comments_since(post_id, since):
+    """Комментарии записи после `since` в порядке появления."""
+    return list(Comment.objects.filter(
+        post_id=post_id, pk__gt=since,
+    ).select_related('author').order_by('pk')[:BATCH_SIZE])
+
+
+def serialize(comment):
+    return {
+        'id': comment.pk,
+        'parent': comment.parent_id,
+        'depth': comment.depth,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    }
+
+
+class Hub:
+    """Общий для процесса опрос версий наблюдаемых записей."""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.watchers = {}
+        self.versions = {}
+        self.thread = None
+
+    def _ensure_thread(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(
+                target=self._poll, name='comment-hub', daemon=True,
+            )
+            self.thread.start()
+
+    def _poll(self):
+        while True:
+            time.sleep(settings.COMMENT_STREAM_POLL)
+            with self.condition:
+                post_ids = list(self.watchers)
+            if not post_ids:
+                continue
+            keys = {
+                COMMENTS_VERSION_KEY.format(post_id): post_id
+                for post_id in post_ids
+            }
+            try:
+                found = cache.get_many(list(keys))
+            except Exception:
+                continue
+            with self.condition:
+                changed = False
+                for key, post_id in keys.items():
+                    version = found.get(key, 0)
+                    if self.versions.get(post_id) != version:
+                        self.versions[post_id] = version
+                        changed = True
+                if changed:
+                    self.condition.notify_all()
+
+    def subscribe(self, post_id):
+        """Начинает наблюдение; возвращает текущую версию записи."""
+        with self.condition:
+            self.watchers[post_id] = self.watchers.get(post_id, 0) + 1
+            if post_id not in self.versions:
+                self.versions[post_id] = cache.get(
+                    COMMENTS_VERSION_KEY.format(post_id), 0,
+                )
+            self._ensure_thread()
+            return self.versions[post_id]
+
+    def unsubscribe(self, post_id):
+        with self.condition:
+            self.watchers[post_id] -= 1
+            if not self.watchers[post_id]:
+                del self.watchers[post_id]
+                self.versions.pop(post_id, None)
+
+    def wait(self, post_id, version, timeout):
+        """Ждёт смены версии записи; возвращает новую версию."""
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.versions.get(post_id) != version, timeout,
+            )
+            return self.versions.get(post_id, version)
+
+
+hub = Hub()
+
+
+def event(name, data, event_id=None):
+    lines = [f'event: {name}']
+    if event_id is not None:
+        lines.insert(0, f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data, ensure_ascii=False)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def stream(post_id, since):
+    """
+    События SSE с новыми комментариями записи.
+
+    Поток закрывается через `COMMENT_STREAM_TIMEOUT` секунд, браузер
+    переподключается сам и передаёт последний id в Last-Event-ID.
+    """
+    version = hub.subscribe(post_id)
+    try:
+        deadline = time.monotonic() + settings.COMMENT_STREAM_TIMEOUT
+        yield f'retry: {settings.COMMENT_STREAM_RETRY_MS}\n\n'
+        check = True
+        while True:
+            if check:
+                for comment in comments_since(post_id, since):
+                    since = comment.pk
+                    yield event('comment', serialize(comment), comment.pk)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            new_version = hub.wait(
+                post_id, version,
+                min(remaining, settings.COMMENT_STREAM_HEARTBEAT),
+            )
+            check = new_version != version
+            version = new_version
+            if not check:
+                # Комментарий SSE держит соединение живым через прокси.
+                yield ': ping\n\n'
+    finally:
+        hub.unsubscribe(post_id)
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации «на кого подписаться» по графу '
+        'подписок: друзья друзей и совместные подписки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=10,
+            help='Сколько рекомендаций хранить для пользователя.',
+        )
+        parser.add_argument(
+            '--block-size', type=int, default=1_000,
+            help='Сколько строк матрицы обрабатывать за раз.',
+        )
+        parser.add_argument(
+            '--co-follow-weight', type=float, default=0.5,
+            help='Вес совместных подписок относительно друзей друзей.',
+        )
+        parser.add_argument(
+            '--similar-users', type=int, default=50,
+            help='Сколько похожих пользователей учитывать.',
+        )
+        parser.add_argument(
+            '--max-followers', type=int, default=1_000,
+            help='Авторы популярнее этого не влияют на сходство.',
+        )
+
+    def handle(self, *args, **options):
+        # NumPy и SciPy нужны только здесь, веб-процессы их не загружают.
+        from posts.recommendations import build_suggestions
+
+        started = time.monotonic()
+        created = build_suggestions(
+            k=options['top'],
+            block_size=options['block_size'],
+            co_follow_weight=options['co_follow_weight'],
+            similar_users=options['similar_users'],
+            max_followers=options['max_followers'],
+        )
+        self.stdout.write(
+            f'Сохранено рекомендаций: {created} '
+            f'за {time.monotonic() - started:.1f} с.'
+        )
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает похожие записи по TF-IDF текста. По умолчанию '
+        'только новые и изменённые записи.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать все записи.',
+        )
+        parser.add_argument(
+            '--top', type=int, default=5,
+            help='Сколько похожих записей хранить.',
+        )
+        parser.add_argument(
+            '--block-size', type=int, default=1_000,
+            help='Сколько записей сравнивать со всеми за раз.',
+        )
+        parser.add_argument(
+            '--min-score', type=float, default=0.05,
+            help='Минимальное косинусное сходство.',
+        )
+        parser.add_argument(
+            '--query-terms', type=int, default=20,
+            help='Сколько самых весомых слов записи сравнивать, 0 — все.',
+        )
+
+    def handle(self, *args, **options):
+        # NumPy и SciPy нужны только здесь, веб-процессы их не загружают.
+        from posts.page_cache import bump_content_version
+        from posts.similar_posts import build_related
+
+        started = time.monotonic()
+        updated = build_related(
+            k=options['top'],
+            block_size=options['block_size'],
+            min_score=options['min_score'],
+            query_terms=options['query_terms'],
+            full=options['full'],
+        )
+        if updated:
+            bump_content_version()
+        self.stdout.write(
+            f'Обновлено записей: {updated} '
+            f'за {time.monotonic() - started:.1f} с.'
+        )
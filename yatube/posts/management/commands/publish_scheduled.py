@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts.scheduling import publish_due
+
+
+class Command(BaseCommand):
+    help = (
+        'Публикует запланированные записи, время которых наступило. '
+        'Обычно это делает фоновая задача; команда нужна для запуска '
+        'по расписанию, если обработчик задач не работает.'
+    )
+
+    def handle(self, *args, **options):
+        published = publish_due()
+        self.stdout.write(f'Опубликовано записей: {published}.')
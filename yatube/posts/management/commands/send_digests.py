@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from core import jobs
+from posts.digests import PERIODS, send_digests
+
+
+class Command(BaseCommand):
+    help = (
+        'Рассылает подписчикам подборки новых записей авторов. '
+        'Запускается по расписанию раз в день или раз в неделю.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--period', choices=list(PERIODS), default='daily',
+            help='За какой период собирать подборку.',
+        )
+        parser.add_argument(
+            '--enqueue', action='store_true',
+            help='Поставить рассылку в очередь фоновых задач.',
+        )
+
+    def handle(self, *args, **options):
+        period = options['period']
+        if options['enqueue']:
+            jobs.enqueue('posts.send_digests', period=period,
+                         dedup_key=f'send_digests:{period}')
+            self.stdout.write('Рассылка поставлена в очередь.')
+            return
+        sent = send_digests(period)
+        self.stdout.write(f'Отправлено писем: {sent}.')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import update_scores
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит накопленные события вовлечённости в оценки популярных '
+        'записей. Запускается по расписанию, например раз в минуту.'
+    )
+
+    def handle(self, *args, **options):
+        processed = update_scores()
+        self.stdout.write(f'Обработано событий: {processed}.')
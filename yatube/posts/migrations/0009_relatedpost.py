@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('computed', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время расчёта')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related', to='posts.Post', verbose_name='Запись')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Post', verbose_name='Похожая запись')),
+            ],
+            options={
+                'verbose_name': 'похожая запись',
+                'verbose_name_plural': 'похожие записи',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='relatedpost',
+            index=models.Index(fields=['post', '-score'], name='related_post_score'),
+        ),
+    ]
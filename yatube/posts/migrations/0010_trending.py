@@ -0,0 +1,48 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_relatedpost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EngagementEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('view', 'Просмотр'), ('comment', 'Комментарий')], max_length=16, verbose_name='Тип')),
+                ('count', models.PositiveIntegerField(default=1, verbose_name='Количество')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время')),
+            ],
+            options={
+                'verbose_name': 'событие вовлечённости',
+                'verbose_name_plural': 'события вовлечённости',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Post', verbose_name='Запись')),
+                ('score', models.FloatField(verbose_name='Логарифм оценки')),
+            ],
+            options={
+                'verbose_name': 'оценка популярности',
+                'verbose_name_plural': 'оценки популярности',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trendingscore',
+            index=models.Index(fields=['-score', '-post'], name='trending_order'),
+        ),
+        migrations.AddField(
+            model_name='engagementevent',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Post', verbose_name='Запись'),
+        ),
+    ]
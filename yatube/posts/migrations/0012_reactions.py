@@ -0,0 +1,67 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0011_post_views'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='reactions_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Реакции'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='reactions_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Реакции'),
+        ),
+        migrations.AlterField(
+            model_name='engagementevent',
+            name='kind',
+            field=models.CharField(choices=[('view', 'Просмотр'), ('comment', 'Комментарий'), ('reaction', 'Реакция')], max_length=16, verbose_name='Тип'),
+        ),
+        migrations.CreateModel(
+            name='Reaction',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('like', '👍'), ('heart', '❤️'), ('laugh', '😄')], max_length=16, verbose_name='Реакция')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Время')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reactions', to='posts.Post', verbose_name='Запись')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reactions', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'реакция на запись',
+                'verbose_name_plural': 'реакции на записи',
+            },
+        ),
+        migrations.CreateModel(
+            name='CommentReaction',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('like', '👍'), ('heart', '❤️'), ('laugh', '😄')], max_length=16, verbose_name='Реакция')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Время')),
+                ('comment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reactions', to='posts.Comment', verbose_name='Комментарий')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comment_reactions', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'реакция на комментарий',
+                'verbose_name_plural': 'реакции на комментарии',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='reaction',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_reaction_user_post'),
+        ),
+        migrations.AddConstraint(
+            model_name='commentreaction',
+            constraint=models.UniqueConstraint(fields=('user', 'comment'), name='unique_reaction_user_comment'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def root_path(pk):
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    segment = ''
+    while pk:
+        pk, digit = divmod(pk, len(digits))
+        segment = digits[digit] + segment
+    return segment.rjust(8, '0')
+
+
+def fill_paths(apps, schema_editor):
+    # Все существующие комментарии — корни своих веток.
+    Comment = apps.get_model('posts', 'Comment')
+    comments = list(Comment.objects.only('pk'))
+    for comment in comments:
+        comment.path = root_path(comment.pk)
+    Comment.objects.bulk_update(comments, ['path'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_bookmark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Глубина'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=255, verbose_name='Путь в ветке'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='replies_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Ответы'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='comment_post_path'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0015_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestLog',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('daily', 'Ежедневно'), ('weekly', 'Еженедельно')], max_length=16, verbose_name='Период')),
+                ('last_post', models.PositiveIntegerField(default=0, verbose_name='Последняя отправленная запись')),
+                ('sent', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Отправлено')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='digest_logs', to=settings.AUTH_USER_MODEL, verbose_name='Получатель')),
+            ],
+            options={
+                'verbose_name': 'отправленная рассылка',
+                'verbose_name_plural': 'отправленные рассылки',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='digestlog',
+            constraint=models.UniqueConstraint(fields=('user', 'period'), name='unique_digest_user_period'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:25
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_digest_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='is_published',
+            field=models.BooleanField(default=True, editable=False, verbose_name='Опубликована'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='publish_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Запланированная публикация'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['is_published', '-pub_date'], name='post_feed'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(is_published=False), fields=['publish_at'], name='post_scheduled'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_last_published(apps, schema_editor):
+    # Отметка переносится на время публикации отправленной записи.
+    DigestLog = apps.get_model('posts', 'DigestLog')
+    Post = apps.get_model('posts', 'Post')
+    DigestLog.objects.update(last_published=Subquery(
+        Post.objects.filter(pk=OuterRef('last_post')).values('pub_date')[:1],
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_scheduled_publishing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='digestlog',
+            name='last_published',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Публикация последней отправленной записи'),
+        ),
+        migrations.RunPython(fill_last_published, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='digestlog',
+            name='last_post',
+        ),
+    ]
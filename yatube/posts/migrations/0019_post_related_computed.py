@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:40
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+
+def fill_related_computed(apps, schema_editor):
+    # Записи с уже рассчитанными соседями не пересчитываются заново.
+    Post = apps.get_model('posts', 'Post')
+    RelatedPost = apps.get_model('posts', 'RelatedPost')
+    Post.objects.update(related_computed=Subquery(
+        RelatedPost.objects.filter(post=OuterRef('pk')).values(
+            'post',
+        ).annotate(computed=Max('computed')).values('computed')[:1],
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_digest_checkpoint_pub_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='related_computed',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Похожие записи рассчитаны'),
+        ),
+        migrations.RunPython(fill_related_computed, migrations.RunPython.noop),
+    ]
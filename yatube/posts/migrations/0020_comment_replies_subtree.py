@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:05
+
+from collections import Counter
+
+from django.db import migrations
+
+PATH_STEP = 8
+
+
+def count_subtree_replies(apps, schema_editor):
+    # Раньше считались только прямые ответы; теперь — вся ветка.
+    Comment = apps.get_model('posts', 'Comment')
+    comments = list(Comment.objects.only('pk', 'path'))
+    counts = Counter(
+        comment.path[:end]
+        for comment in comments
+        for end in range(PATH_STEP, len(comment.path), PATH_STEP)
+    )
+    for comment in comments:
+        comment.replies_count = counts[comment.path]
+    Comment.objects.bulk_update(comments, ['replies_count'], batch_size=500)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_post_related_computed'),
+    ]
+
+    operations = [
+        migrations.RunPython(count_subtree_replies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_comment_replies_subtree'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='edited',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Изменена'),
+        ),
+    ]
@@ -1,7 +1,8 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
-from django.db.models import UniqueConstraint
+from django.db import models, transaction
+from django.db.models import Q, UniqueConstraint
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -19,6 +20,12 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def published(self):
+        """Записи, видимые в лентах: запланированные ещё не вышли."""
+        return self.filter(is_published=True)
+
+
 class Post(models.Model):
     text = models.TextField('Текст поста', help_text='Введите текст поста')
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
@@ -42,17 +49,78 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True,
     )
+    last_activity = models.DateTimeField(
+        'Последняя активность',
+        default=timezone.now,
+        db_index=True,
+        editable=False,
+    )
+    views = models.PositiveIntegerField(
+        'Просмотры', default=0, editable=False,
+    )
+    reactions_count = models.IntegerField(
+        'Реакции', default=0, editable=False,
+    )
+    publish_at = models.DateTimeField(
+        'Запланированная публикация', default=timezone.now, editable=False,
+    )
+    is_published = models.BooleanField(
+        'Опубликована', default=True, editable=False,
+    )
+    # Время последнего редактирования текста; в отличие от
+    # `last_activity`, комментарии его не меняют.
+    edited = models.DateTimeField(
+        'Изменена', null=True, blank=True, editable=False,
+    )
+    # Отметка ставится и записям без достаточно похожих соседей,
+    # иначе каждый запуск пересчитывал бы их заново.
+    related_computed = models.DateTimeField(
+        'Похожие записи рассчитаны', null=True, blank=True, editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
         default_related_name = 'posts'
         verbose_name = 'запись'
         verbose_name_plural = 'записи'
+        indexes = [
+            models.Index(
+                fields=['is_published', '-pub_date'], name='post_feed',
+            ),
+            # Планировщик ищет только неопубликованные записи.
+            models.Index(
+                fields=['publish_at'], condition=Q(is_published=False),
+                name='post_scheduled',
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.text[:settings.CUT_TEXT]
 
 
+# Путь комментария — номера всех его предков и его собственный, каждый
+# в PATH_STEP знаках base36. Сортировка по пути даёт ветку в порядке
+# обхода, а поддерево занимает непрерывный диапазон индекса.
+PATH_STEP = 8
+PATH_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+PATH_END = '~'
+
+
+def ancestor_paths(path):
+    """Пути всех предков комментария с путём `path`."""
+    return [path[:end] for end in range(PATH_STEP, len(path), PATH_STEP)]
+
+
+def comment_path(parent_path, pk):
+    segment = ''
+    while pk:
+        pk, digit = divmod(pk, len(PATH_DIGITS))
+        segment = PATH_DIGITS[digit] + segment
+    return parent_path + segment.rjust(PATH_STEP, '0')
+
+
 class Comment(models.Model):
     text = models.TextField(
         'Текст комментария',
@@ -72,14 +140,73 @@ class Comment(models.Model):
         related_name='comments',
         verbose_name='Запись',
     )
+    reactions_count = models.IntegerField(
+        'Реакции', default=0, editable=False,
+    )
+    parent = models.ForeignKey(
+        'self',
+        blank=True, null=True,
+        on_delete=models.CASCADE,
+        related_name='replies',
+        verbose_name='Ответ на',
+    )
+    path = models.CharField(
+        'Путь в ветке', max_length=255, default='', editable=False,
+    )
+    depth = models.PositiveSmallIntegerField(
+        'Глубина', default=0, editable=False,
+    )
+    # Все ответы ветки, а не только прямые: столько скрыто под ссылкой
+    # «Ещё ответов» на предельной глубине.
+    replies_count = models.PositiveIntegerField(
+        'Ответы', default=0, editable=False,
+    )
 
     class Meta:
         verbose_name = 'комментарий'
         verbose_name_plural = 'комментарии'
+        indexes = [
+            models.Index(fields=['post', 'path'], name='comment_post_path'),
+        ]
 
     def __str__(self):
         return self.text[:settings.CUT_TEXT]
 
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет комментарий; новый получает путь в той же транзакции.
+
+        Обработчики `post_save` откладывают сброс кэша до фиксации, поэтому
+        страницу с комментарием без пути никто не закэширует.
+        """
+        creating = self.pk is None
+        if creating and self.parent_id is not None:
+            parent = self.parent
+            # Ответ глубже предела становится ответом на ту же ветку.
+            if parent.depth >= settings.COMMENT_MAX_DEPTH:
+                parent = self.parent = parent.parent
+            self.depth = parent.depth + 1
+        if not creating:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.path = comment_path(
+                self.parent.path if self.parent_id else '', self.pk,
+            )
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+            if self.parent_id is not None:
+                Comment.objects.filter(
+                    path__in=ancestor_paths(self.path),
+                ).update(replies_count=models.F('replies_count') + 1)
+
+    def subtree(self):
+        """Все ответы ветки по порядку: один запрос по диапазону пути."""
+        return Comment.objects.filter(
+            post_id=self.post_id,
+            path__gt=self.path,
+            path__lt=self.path + PATH_END,
+        ).order_by('path')
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -106,3 +233,314 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'{self.user.username}, {self.following.username}'
+
+
+class FollowSuggestion(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+        verbose_name='Пользователь',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендуемый автор',
+    )
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        verbose_name = 'рекомендация подписки'
+        verbose_name_plural = 'рекомендации подписок'
+        indexes = [
+            models.Index(
+                fields=['user', '-score'], name='suggestion_user_score',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} → {self.author_id}: {self.score:.2f}'
+
+
+class RelatedPost(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='related',
+        verbose_name='Запись',
+    )
+    related = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожая запись',
+    )
+    score = models.FloatField('Сходство')
+    computed = models.DateTimeField('Время расчёта', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'похожая запись'
+        verbose_name_plural = 'похожие записи'
+        indexes = [
+            models.Index(
+                fields=['post', '-score'], name='related_post_score',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} → {self.related_id}: {self.score:.2f}'
+
+
+class EngagementEvent(models.Model):
+    VIEW = 'view'
+    COMMENT = 'comment'
+    REACTION = 'reaction'
+    KINDS = (
+        (VIEW, 'Просмотр'),
+        (COMMENT, 'Комментарий'),
+        (REACTION, 'Реакция'),
+    )
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Запись',
+    )
+    kind = models.CharField('Тип', max_length=16, choices=KINDS)
+    count = models.PositiveIntegerField('Количество', default=1)
+    created = models.DateTimeField('Время', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'событие вовлечённости'
+        verbose_name_plural = 'события вовлечённости'
+
+    def __str__(self):
+        return f'{self.kind} ×{self.count} → {self.post_id}'
+
+
+class TrendingScore(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Запись',
+    )
+    score = models.FloatField('Логарифм оценки')
+
+    class Meta:
+        verbose_name = 'оценка популярности'
+        verbose_name_plural = 'оценки популярности'
+        indexes = [
+            models.Index(fields=['-score', '-post'], name='trending_order'),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id}: {self.score:.2f}'
+
+
+REACTION_KINDS = (
+    ('like', '👍'),
+    ('heart', '❤️'),
+    ('laugh', '😄'),
+)
+
+
+class Reaction(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='reactions',
+        verbose_name='Пользователь',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='reactions',
+        verbose_name='Запись',
+    )
+    kind = models.CharField('Реакция', max_length=16, choices=REACTION_KINDS)
+    created = models.DateTimeField('Время', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'реакция на запись'
+        verbose_name_plural = 'реакции на записи'
+        constraints = [
+            UniqueConstraint(
+                fields=['user', 'post'], name='unique_reaction_user_post',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} {self.kind} → {self.post_id}'
+
+
+class CommentReaction(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='comment_reactions',
+        verbose_name='Пользователь',
+    )
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        related_name='reactions',
+        verbose_name='Комментарий',
+    )
+    kind = models.CharField('Реакция', max_length=16, choices=REACTION_KINDS)
+    created = models.DateTimeField('Время', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'реакция на комментарий'
+        verbose_name_plural = 'реакции на комментарии'
+        constraints = [
+            UniqueConstraint(
+                fields=['user', 'comment'],
+                name='unique_reaction_user_comment',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} {self.kind} → {self.comment_id}'
+
+
+class Bookmark(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='bookmarks',
+        verbose_name='Пользователь',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='bookmarks',
+        verbose_name='Запись',
+    )
+    created = models.DateTimeField('Время', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'закладка'
+        verbose_name_plural = 'закладки'
+        constraints = [
+            UniqueConstraint(
+                fields=['user', 'post'], name='unique_bookmark_user_post',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-created', '-id'],
+                name='bookmark_user_created',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} → {self.post_id}'
+
+
+class Notification(models.Model):
+    NEW_POST = 'post'
+    COMMENT = 'comment'
+    REPLY = 'reply'
+    KINDS = (
+        (NEW_POST, 'Новая запись'),
+        (COMMENT, 'Комментарий к записи'),
+        (REPLY, 'Ответ на комментарий'),
+    )
+
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель',
+    )
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор события',
+    )
+    kind = models.CharField('Тип', max_length=16, choices=KINDS)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Запись',
+    )
+    comment = models.ForeignKey(
+        Comment,
+        blank=True, null=True,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Комментарий',
+    )
+    created = models.DateTimeField('Время', default=timezone.now)
+    is_read = models.BooleanField('Прочитано', default=False)
+
+    class Meta:
+        verbose_name = 'уведомление'
+        verbose_name_plural = 'уведомления'
+        indexes = [
+            models.Index(
+                fields=['recipient', '-id'], name='notification_inbox',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} → {self.recipient_id}'
+
+
+class NotificationCounter(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter',
+        verbose_name='Пользователь',
+    )
+    unread = models.PositiveIntegerField('Непрочитанные', default=0)
+
+    class Meta:
+        verbose_name = 'счётчик уведомлений'
+        verbose_name_plural = 'счётчики уведомлений'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.unread}'
+
+
+class DigestLog(models.Model):
+    DAILY = 'daily'
+    WEEKLY = 'weekly'
+    PERIODS = (
+        (DAILY, 'Ежедневно'),
+        (WEEKLY, 'Еженедельно'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='digest_logs',
+        verbose_name='Получатель',
+    )
+    period = models.CharField('Период', max_length=16, choices=PERIODS)
+    # Время публикации, а не id: запланированная запись получает
+    # id при создании, а pub_date — в момент публикации.
+    last_published = models.DateTimeField(
+        'Публикация последней отправленной записи', null=True, blank=True,
+    )
+    sent = models.DateTimeField('Отправлено', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'отправленная рассылка'
+        verbose_name_plural = 'отправленные рассылки'
+        constraints = [
+            UniqueConstraint(
+                fields=['user', 'period'], name='unique_digest_user_period',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.period} до {self.last_published}'
@@ -0,0 +1,149 @@
+"""
+Уведомления о новых записях и комментариях.
+
+Рассылка подписчикам выполняется фоновой задачей, поэтому запрос,
+создавший запись, её не ждёт. Подписчики читаются потоком
+и обрабатываются пачками: уведомления пачки создаются одним
+`bulk_create`, а счётчики непрочитанных увеличиваются одним `UPDATE`.
+Счётчик хранится в отдельной таблице, и шапке сайта не нужно считать
+уведомления.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from core import jobs
+
+from .models import Comment, Follow, Notification, NotificationCounter, Post
+
+UNREAD_CACHE_KEY = 'notifications:unread:{}'
+
+
+def unread_count(user_id):
+    """Число непрочитанных уведомлений; обычно без запроса к базе."""
+    key = UNREAD_CACHE_KEY.format(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = NotificationCounter.objects.filter(
+            user_id=user_id,
+        ).values_list('unread', flat=True).first() or 0
+        cache.set(key, count)
+    return count
+
+
+def refresh_unread(user_ids):
+    """
+    Перечитывает счётчики пользователей в кэш одним запросом.
+
+    Ключи перезаписываются, а не удаляются: следующее чтение берёт
+    счётчик из кэша, а не из базы.
+    """
+    counts = dict.fromkeys(user_ids, 0)
+    counts.update(NotificationCounter.objects.filter(
+        user_id__in=user_ids,
+    ).values_list('user_id', 'unread'))
+    cache.set_many({
+        UNREAD_CACHE_KEY.format(user_id): count
+        for user_id, count in counts.items()
+    })
+
+
+def deliver(notifications):
+    """Сохраняет пачку уведомлений и увеличивает счётчики получателей."""
+    recipients = {}
+    for notification in notifications:
+        recipients[notification.recipient_id] = (
+            recipients.get(notification.recipient_id, 0) + 1
+        )
+    if not recipients:
+        return
+    with transaction.atomic():
+        Notification.objects.bulk_create(notifications)
+        NotificationCounter.objects.bulk_create(
+            [NotificationCounter(user_id=user_id) for user_id in recipients],
+            ignore_conflicts=True,
+        )
+        # Почти всегда получатель встречается в пачке один раз.
+        by_count = {}
+        for user_id, count in recipients.items():
+            by_count.setdefault(count, []).append(user_id)
+        for count, user_ids in by_count.items():
+            NotificationCounter.objects.filter(
+                user_id__in=user_ids,
+            ).update(unread=F('unread') + count)
+    refresh_unread(list(recipients))
+
+
+@jobs.register('posts.fan_out_post')
+def fan_out_post(post_id):
+    """
+    Уведомляет подписчиков автора о новой записи; возвращает их число.
+
+    Уже уведомлённые подписчики пропускаются, поэтому повтор задачи
+    после сбоя посреди рассылки не дублирует уведомления.
+    """
+    post = Post.objects.filter(pk=post_id).values('author_id').first()
+    if post is None:
+        return 0
+    author_id = post['author_id']
+    batch_size = settings.NOTIFICATION_BATCH_SIZE
+    notified = Notification.objects.filter(
+        post_id=post_id, kind=Notification.NEW_POST,
+    ).values('recipient_id')
+    followers = Follow.objects.filter(author_id=author_id).exclude(
+        user_id__in=notified,
+    ).order_by('pk').values_list('user_id', flat=True).iterator(
+        chunk_size=batch_size,
+    )
+    delivered = 0
+    batch = []
+    for user_id in followers:
+        batch.append(Notification(
+            recipient_id=user_id, actor_id=author_id,
+            kind=Notification.NEW_POST, post_id=post_id,
+        ))
+        if len(batch) >= batch_size:
+            deliver(batch)
+            delivered += len(batch)
+            batch = []
+    deliver(batch)
+    return delivered + len(batch)
+
+
+@jobs.register('posts.notify_comment')
+def notify_comment(comment_id):
+    """Уведомляет автора записи и автора комментария, на который ответили."""
+    comment = Comment.objects.select_related(
+        'post', 'parent',
+    ).filter(pk=comment_id).first()
+    if comment is None:
+        return 0
+    recipients = {}
+    if comment.parent is not None:
+        recipients[comment.parent.author_id] = Notification.REPLY
+    recipients.setdefault(comment.post.author_id, Notification.COMMENT)
+    recipients.pop(comment.author_id, None)
+    deliver([
+        Notification(
+            recipient_id=user_id, actor_id=comment.author_id, kind=kind,
+            post_id=comment.post_id, comment_id=comment.pk,
+        )
+        for user_id, kind in recipients.items()
+    ])
+    return len(recipients)
+
+
+def mark_read(user, last_id):
+    """Отмечает прочитанными уведомления до `last_id` включительно."""
+    with transaction.atomic():
+        updated = Notification.objects.filter(
+            recipient=user, is_read=False, pk__lte=last_id,
+        ).update(is_read=True)
+        if updated:
+            NotificationCounter.objects.filter(user=user).update(
+                unread=F('unread') - updated,
+            )
+    if updated:
+        refresh_unread([user.pk])
+    return updated
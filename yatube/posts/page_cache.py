@@ -0,0 +1,177 @@
+import hashlib
+import re
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from core import fragments
+
+from .models import Post
+
+# Номер версии содержимого: меняется при любом изменении записей
+# и комментариев, и все закэшированные страницы становятся устаревшими.
+CONTENT_VERSION_KEY = 'posts:content_version'
+
+# Маскированный токен CSRF меняется при каждом рендере, но старый
+# остаётся действительным, поэтому в ETag он не учитывается.
+CSRF_TOKEN_RE = re.compile(rb'name="csrfmiddlewaretoken" value="[^"]*"')
+
+
+def content_version():
+    """
+    Текущая версия содержимого.
+
+    Пропавший ключ (вытеснен или кэш очищен) начинается с текущего
+    времени в наносекундах, а не с нуля: иначе снова стали бы
+    действительны страницы, закэшированные под старыми номерами.
+    """
+    version = cache.get(CONTENT_VERSION_KEY)
+    if version is None:
+        cache.add(CONTENT_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(CONTENT_VERSION_KEY, 0)
+    return version
+
+
+def bump_content_version():
+    """Сбрасывает кэш страниц после изменения записей или комментариев."""
+    try:
+        cache.incr(CONTENT_VERSION_KEY)
+    except ValueError:
+        cache.add(CONTENT_VERSION_KEY, time.time_ns(), None)
+
+
+def page_cache_key(request, prefix):
+    """Ключ страницы: только путь, номер страницы и курсор, без cookies."""
+    page = request.GET.get('page', '')
+    after = request.GET.get('after', '')
+    digest = hashlib.md5(
+        f'{request.path}?page={page}&after={after}'.encode(),
+    ).hexdigest()
+    return f'{prefix}:{content_version()}:{digest}'
+
+
+def conditional_response(request, content, content_type, etag,
+                         last_modified=None):
+    """Ответ из кэша или 304 Not Modified, если клиент его уже видел."""
+    response = HttpResponse(content, content_type=content_type)
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return get_conditional_response(
+        request, etag=etag, last_modified=last_modified, response=response,
+    )
+
+
+def content_etag(content):
+    return quote_etag(
+        hashlib.md5(CSRF_TOKEN_RE.sub(b'', content)).hexdigest(),
+    )
+
+
+def anonymous_response(request, content, content_type, last_modified):
+    """
+    Ответ гостю из готовой страницы.
+
+    Изменчивые фрагменты (счётчик просмотров) подставляются на каждый
+    запрос; у такой страницы нет Last-Modified, и 304 отдаётся только
+    по ETag итогового содержимого.
+    """
+    if fragments.PLACEHOLDER_RE.search(content):
+        content = fragments.substitute(request, content)
+        last_modified = None
+    content = content.encode()
+    return conditional_response(request, content, content_type,
+                                content_etag(content), last_modified)
+
+
+def cached_page(view_func):
+    """
+    Кэширует страницу для всех читателей.
+
+    Тело страницы рендерится один раз с заглушками вместо фрагментов,
+    зависящих от пользователя (шапка, переключатель лент, кнопки), и
+    хранится до изменения записей или комментариев. На каждый запрос в
+    него подставляются фрагменты текущего пользователя. Для гостей
+    готовая страница кэшируется целиком, кроме изменчивых фрагментов,
+    и отдаётся с ETag и Last-Modified, поэтому повторный визит получает
+    304 без тела.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view_func(request, *args, **kwargs)
+        anonymous = not request.user.is_authenticated
+        if anonymous:
+            anonymous_key = page_cache_key(request, 'page:anonymous')
+            entry = cache.get(anonymous_key)
+            if entry is not None:
+                return anonymous_response(request, *entry)
+
+        body_key = page_cache_key(request, 'page:body')
+        body = cache.get(body_key)
+        if body is None:
+            request.punch_holes = True
+            try:
+                response = view_func(request, *args, **kwargs)
+            finally:
+                request.punch_holes = False
+            if response.status_code != 200 or response.streaming:
+                return fragments.substitute_response(request, response)
+            body = (response.content.decode(), response['Content-Type'])
+            cache.set(body_key, body, settings.PAGE_CACHE_TIMEOUT)
+
+        if anonymous:
+            entry = (
+                fragments.substitute(request, body[0], keep_volatile=True),
+                body[1], int(time.time()),
+            )
+            cache.set(anonymous_key, entry, settings.PAGE_CACHE_TIMEOUT)
+            return anonymous_response(request, *entry)
+        content = fragments.substitute(request, body[0]).encode()
+        # Фрагменты пользователя меняются независимо от записей,
+        # поэтому для авторизованных проверяется только ETag.
+        return conditional_response(request, content, body[1],
+                                    content_etag(content))
+    return wrapper
+
+
+def post_not_modified(view_func):
+    """
+    Отвечает гостю 304 на условный запрос страницы записи.
+
+    ETag строится по `Post.last_activity`, которое меняют редактирование
+    записи и новые комментарии, и по записанному в базу числу
+    просмотров. Проверка стоит одного запроса по первичному ключу
+    и выполняется до загрузки страницы. Last-Modified не отдаётся:
+    просмотры меняют страницу, но не время активности.
+    Страница авторизованного пользователя содержит его реакцию,
+    закладку и счётчик уведомлений, которых `last_activity` не видит,
+    поэтому для него действует ETag содержимого из `cached_page`.
+    """
+    @wraps(view_func)
+    def wrapper(request, post_id, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated):
+            return view_func(request, post_id, *args, **kwargs)
+        state = Post.objects.filter(pk=post_id).values_list(
+            'last_activity', 'views',
+        ).first()
+        if state is None:
+            return view_func(request, post_id, *args, **kwargs)
+        last_activity, views = state
+        etag = quote_etag('{}-{}-{}'.format(
+            post_id, int(last_activity.timestamp() * 1000000), views,
+        ))
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+        response = view_func(request, post_id, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+        return response
+    return wrapper
@@ -0,0 +1,71 @@
+"""
+Реакции на записи и комментарии.
+
+Строка реакции уникальна для пары (пользователь, объект), а счётчик
+на объекте меняется буферизованно: горячая запись получает тысячи
+реакций в минуту, и построчное обновление счётчика упиралось бы
+в блокировку записи.
+"""
+from django.db import IntegrityError, transaction
+
+from .counters import comment_reactions, post_reactions
+from .models import Comment, CommentReaction, Post, Reaction
+
+TARGETS = {
+    'post': (Post, Reaction, 'post_id', post_reactions),
+    'comment': (Comment, CommentReaction, 'comment_id', comment_reactions),
+}
+
+
+def toggle(user, target, target_id, kind):
+    """
+    Ставит реакцию, меняет её вид или снимает ту же реакцию повторно.
+
+    Возвращает текущий вид реакции пользователя или None.
+    """
+    _, model, field, counter = TARGETS[target]
+    lookup = {'user': user, field: target_id}
+    current = model.objects.filter(**lookup).values_list(
+        'kind', flat=True,
+    ).first()
+    if current == kind:
+        deleted, _ = model.objects.filter(**lookup).delete()
+        if deleted:
+            counter.add(target_id, -1)
+        return None
+    if current is not None:
+        model.objects.filter(**lookup).update(kind=kind)
+        return kind
+    try:
+        with transaction.atomic():
+            model.objects.create(kind=kind, **lookup)
+    except IntegrityError:
+        # Параллельный запрос того же пользователя успел первым.
+        return kind
+    counter.add(target_id)
+    return kind
+
+
+def reaction_states(user, target, target_ids):
+    """
+    Счётчики и реакции пользователя для всех объектов страницы.
+
+    Два запроса на всю страницу; к счётчику добавляются приращения,
+    которые этот процесс ещё не записал.
+    """
+    target_model, model, field, counter = TARGETS[target]
+    counts = dict(target_model.objects.filter(
+        pk__in=target_ids,
+    ).order_by().values_list('pk', 'reactions_count'))
+    mine = {}
+    if user.is_authenticated:
+        mine = dict(model.objects.filter(
+            user=user, **{f'{field}__in': target_ids},
+        ).values_list(field, 'kind'))
+    return {
+        target_id: (
+            max(0, counts.get(target_id, 0) + counter.unflushed(target_id)),
+            mine.get(target_id),
+        )
+        for target_id in target_ids
+    }
@@ -0,0 +1,171 @@
+"""
+Рекомендации «на кого подписаться» по графу подписок.
+
+Граф выгружается в разреженную матрицу смежности CSR: строка —
+подписчик, столбец — автор. Оценки считаются матричными произведениями
+по блокам строк, поэтому память ограничена размером блока, а не числом
+пользователей, а база блокируется на запись только на время записи
+одного блока.
+"""
+import numpy as np
+from django.db import connection, transaction
+from scipy import sparse
+
+from .models import Follow, FollowSuggestion
+
+FETCH_SIZE = 100_000
+
+
+def load_graph():
+    """
+    Читает таблицу подписок в матрицу смежности.
+
+    Возвращает матрицу и массив идентификаторов пользователей: индекс
+    строки или столбца матрицы — позиция пользователя в этом массиве.
+    """
+    user_column = Follow._meta.get_field('user').column
+    author_column = Follow._meta.get_field('author').column
+    chunks = []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT {user_column}, {author_column} '
+            f'FROM {Follow._meta.db_table}'
+        )
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            chunks.append(np.array(rows, dtype=np.int64))
+    edges = (
+        np.concatenate(chunks) if chunks
+        else np.empty((0, 2), dtype=np.int64)
+    )
+    ids = np.unique(edges)
+    followers = np.searchsorted(ids, edges[:, 0])
+    authors = np.searchsorted(ids, edges[:, 1])
+    graph = sparse.csr_matrix(
+        (np.ones(len(edges), dtype=np.float32), (followers, authors)),
+        shape=(len(ids), len(ids)),
+    )
+    return graph, ids
+
+
+def _itself(start, stop, shape):
+    """Матрица блока с единицами в столбцах самих пользователей."""
+    rows = np.arange(stop - start)
+    return sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, rows + start)),
+        shape=shape,
+    )
+
+
+def co_follow_matrix(graph, max_followers):
+    """
+    Авторы × подписчики с весом автора 1 / log2(2 + подписчиков).
+
+    Произведение строки графа на эту матрицу даёт похожесть пользователя
+    на остальных: общий популярный автор говорит о сходстве меньше,
+    а авторы больше чем с `max_followers` подписчиками не учитываются
+    совсем — иначе их подписчики похожи на всех.
+    """
+    popularity = np.asarray(graph.sum(axis=0)).ravel()
+    weights = (1 / np.log2(2 + popularity)).astype(np.float32)
+    weights[popularity > max_followers] = 0
+    matrix = sparse.csr_matrix(sparse.diags(weights) @ graph.T)
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def keep_top(matrix, k):
+    """Оставляет в каждой строке CSR-матрицы k наибольших значений."""
+    rows, columns, data = [], [], []
+    for row, column, value in top_k(matrix, k):
+        rows.append(row)
+        columns.append(column)
+        data.append(value)
+    return sparse.csr_matrix(
+        (np.array(data, dtype=np.float32), (rows, columns)),
+        shape=matrix.shape,
+    )
+
+
+def score_block(graph, neighbours, start, stop, co_follow_weight,
+                similar_users):
+    """
+    Оценки кандидатов для строк `start:stop`.
+
+    Друзья друзей: сколько авторов пользователя подписаны на кандидата.
+    Совместные подписки: на кого подписаны `similar_users` самых похожих
+    пользователей, с весом их сходства.
+    """
+    block = graph[start:stop]
+    scores = block @ graph
+    if co_follow_weight:
+        similar = block @ neighbours
+        similar = similar - similar.multiply(
+            _itself(start, stop, similar.shape))
+        similar.eliminate_zeros()
+        similar = keep_top(similar, similar_users)
+        scores = scores + co_follow_weight * (similar @ graph)
+    # Себя и уже прочитанных авторов не рекомендуем.
+    exclude = block + _itself(start, stop, block.shape)
+    scores = sparse.csr_matrix(scores - scores.multiply(exclude > 0))
+    scores.eliminate_zeros()
+    return scores
+
+
+def top_k(scores, k):
+    """Пары (строка, столбец, оценка) лучших k кандидатов каждой строки."""
+    for row in range(scores.shape[0]):
+        begin, end = scores.indptr[row], scores.indptr[row + 1]
+        if begin == end:
+            continue
+        data = scores.data[begin:end]
+        columns = scores.indices[begin:end]
+        if len(data) > k:
+            best = np.argpartition(-data, k - 1)[:k]
+            data, columns = data[best], columns[best]
+        for position in np.argsort(-data, kind='stable'):
+            yield row, columns[position], float(data[position])
+
+
+def build_suggestions(k=10, block_size=1_000, batch_size=5_000,
+                      co_follow_weight=0.5, similar_users=50,
+                      max_followers=1_000):
+    """
+    Пересчитывает таблицу рекомендаций целиком; возвращает число строк.
+
+    Рекомендации заменяются по диапазонам id пользователей: блок
+    считается вне транзакции, а затем его диапазон удаляется
+    и записывается заново одной короткой транзакцией. Диапазоны
+    примыкают друг к другу, поэтому удаляются и рекомендации
+    пользователей, которых больше нет в графе.
+    """
+    graph, ids = load_graph()
+    neighbours = co_follow_matrix(graph, max_followers)
+    if not len(ids):
+        FollowSuggestion.objects.all().delete()
+        return 0
+    created = 0
+    for start in range(0, graph.shape[0], block_size):
+        stop = min(start + block_size, graph.shape[0])
+        scores = score_block(graph, neighbours, start, stop,
+                             co_follow_weight, similar_users)
+        batch = [
+            FollowSuggestion(
+                user_id=int(ids[start + row]),
+                author_id=int(ids[column]),
+                score=score,
+            )
+            for row, column, score in top_k(scores, k)
+        ]
+        users = FollowSuggestion.objects.all()
+        if start:
+            users = users.filter(user_id__gte=int(ids[start]))
+        if stop < len(ids):
+            users = users.filter(user_id__lt=int(ids[stop]))
+        with transaction.atomic():
+            users.delete()
+            FollowSuggestion.objects.bulk_create(batch, batch_size)
+        created += len(batch)
+    return created
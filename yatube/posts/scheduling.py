@@ -0,0 +1,56 @@
+"""
+Отложенная публикация записей.
+
+Запланированная запись хранится с `is_published=False` и в ленты
+не попадает: ленты фильтруют только по флагу и не сравнивают время
+в каждом запросе. Когда время наступает, `publish_due` переводит
+записи в опубликованные пачками, ставит рассылку подписчикам и один
+раз сбрасывает кэш страниц.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core import jobs
+
+from .models import Post
+from .page_cache import bump_content_version
+
+
+def schedule(post):
+    """Ставит публикацию записи на её время в очередь задач."""
+    delay = (post.publish_at - timezone.now()).total_seconds()
+    # Записи на одну минуту публикует одна задача.
+    jobs.enqueue(
+        'posts.publish_due', delay=max(0, delay),
+        dedup_key=f'publish_due:{post.publish_at:%Y%m%d%H%M}',
+    )
+
+
+@jobs.register('posts.publish_due')
+def publish_due():
+    """Публикует записи, время которых наступило; возвращает их число."""
+    now = timezone.now()
+    published = 0
+    while True:
+        ids = list(Post.objects.filter(
+            is_published=False, publish_at__lte=now,
+        ).order_by('publish_at', 'pk').values_list(
+            'pk', flat=True,
+        )[:settings.PUBLISH_BATCH_SIZE])
+        if not ids:
+            break
+        with transaction.atomic():
+            # Дата публикации — фактическое время, а не запланированное:
+            # задача может опоздать, и запись не должна встать в ленте
+            # и в подборках позади уже показанных.
+            Post.objects.filter(pk__in=ids, is_published=False).update(
+                is_published=True, pub_date=timezone.now(),
+            )
+            for pk in ids:
+                jobs.enqueue('posts.fan_out_post', post_id=pk,
+                             dedup_key=f'fan_out_post:{pk}')
+        published += len(ids)
+    if published:
+        bump_content_version()
+    return published
@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core import jobs
+
+from .models import Comment, EngagementEvent, Group, Post
+from .live import bump_comments_version
+from .page_cache import bump_content_version
+from .trending import record_event
+from .utils import GROUP_CACHE_KEY
+
+
+def bump_after_commit(bump, *args):
+    """
+    Меняет версию сразу и ещё раз после фиксации транзакции.
+
+    Пока транзакция не зафиксирована, другие процессы изменения не видят
+    и могут закэшировать старую страницу под уже новой версией; второй
+    сброс её вытесняет. Первый нужен самой транзакции, которая читает
+    свои изменения до фиксации.
+    """
+    bump(*args)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: bump(*args))
+
+
+@receiver((post_save, post_delete), sender=Group)
+def invalidate_group(sender, instance, **kwargs):
+    """Сбрасывает кэш метаданных сообщества при его изменении."""
+    cache.delete(GROUP_CACHE_KEY.format(instance.slug))
+
+
+@receiver((post_save, post_delete), sender=Post)
+@receiver((post_save, post_delete), sender=Comment)
+@receiver((post_save, post_delete), sender=Group)
+def invalidate_pages(sender, **kwargs):
+    """Сбрасывает кэш страниц при изменении записей и комментариев."""
+    bump_after_commit(bump_content_version)
+
+
+@receiver(post_save, sender=Comment)
+def record_comment(sender, instance, created, **kwargs):
+    """Учитывает новый комментарий в популярном и в живой ленте."""
+    if created:
+        record_event(instance.post_id, EngagementEvent.COMMENT)
+        bump_after_commit(bump_comments_version, instance.post_id)
+
+
+@receiver(post_save, sender=Post)
+def notify_followers(sender, instance, created, **kwargs):
+    """
+    Ставит рассылку уведомлений о новой записи в очередь задач.
+
+    Для запланированной записи рассылку ставит планировщик при публикации.
+    """
+    if created and instance.is_published:
+        jobs.enqueue('posts.fan_out_post', post_id=instance.pk,
+                     dedup_key=f'fan_out_post:{instance.pk}')
+
+
+@receiver(post_save, sender=Comment)
+def notify_commented(sender, instance, created, **kwargs):
+    """Уведомляет автора записи и автора комментария, на который ответили."""
+    if created:
+        jobs.enqueue('posts.notify_comment', comment_id=instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def make_thumbnail(sender, instance, **kwargs):
+    """Ставит создание миниатюры картинки записи в очередь задач."""
+    if instance.image:
+        jobs.enqueue('posts.make_thumbnail', post_id=instance.pk,
+                     dedup_key=f'make_thumbnail:{instance.pk}')
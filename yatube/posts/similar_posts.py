@@ -0,0 +1,140 @@
+"""
+Похожие записи по тексту.
+
+Тексты превращаются в хешированные векторы TF-IDF: слово попадает
+в одну из `FEATURES` корзин по crc32, поэтому словарь хранить не нужно.
+Векторы нормированы, и сходство двух записей — скалярное произведение.
+Соседи считаются блоками строк разреженной матрицы, и каждый блок
+сохраняется отдельной транзакцией.
+"""
+import re
+import zlib
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from scipy import sparse
+
+from .models import Post, RelatedPost
+from .recommendations import keep_top, top_k
+
+FEATURES = 2 ** 18
+# В небольшом корпусе частые слова не отбрасываются: произведение
+# матриц и так дешёвое, а без них сходство почти не находится.
+MIN_DOCUMENTS_FOR_MAX_DF = 1_000
+WORD_RE = re.compile(r'\w{3,}')
+
+
+def hash_words(text):
+    """Номера корзин всех слов текста."""
+    return [
+        zlib.crc32(word.encode()) % FEATURES
+        for word in WORD_RE.findall(text.lower())
+    ]
+
+
+def build_vectors(texts, max_df=0.5):
+    """
+    Нормированная матрица TF-IDF: строка — текст, столбец — корзина.
+
+    В большом корпусе корзины, которые встречаются больше чем в `max_df`
+    доле текстов, отбрасываются: такие слова ничего не говорят
+    о сходстве, но делают произведение матриц плотным.
+    """
+    rows, columns = [], []
+    for row, text in enumerate(texts):
+        buckets = hash_words(text)
+        rows.extend([row] * len(buckets))
+        columns.extend(buckets)
+    counts = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+        shape=(len(texts), FEATURES),
+    )
+    counts.sum_duplicates()
+    documents = np.bincount(counts.indices, minlength=FEATURES)
+    idf = np.log((1 + len(texts)) / (1 + documents)).astype(np.float32) + 1
+    if len(texts) >= MIN_DOCUMENTS_FOR_MAX_DF:
+        idf[documents > max_df * len(texts)] = 0
+    counts.data = np.log1p(counts.data)
+    vectors = sparse.csr_matrix(counts @ sparse.diags(idf))
+    norms = np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1)))
+    norms[norms == 0] = 1
+    vectors = sparse.csr_matrix(vectors.multiply(1 / norms))
+    vectors.eliminate_zeros()
+    return vectors
+
+
+def stale_posts():
+    """
+    Записи, для которых соседи не считались или текст изменился после.
+
+    Сравнивается время редактирования, а не `last_activity`: новые
+    комментарии текст не меняют.
+    """
+    return Post.objects.filter(
+        Q(related_computed__isnull=True)
+        | Q(edited__gt=F('related_computed')),
+    ).values_list('pk', flat=True)
+
+
+def build_related(k=5, block_size=1_000, batch_size=5_000,
+                  min_score=0.05, query_terms=20, full=False):
+    """
+    Пересчитывает похожие записи; возвращает число обновлённых записей.
+
+    Без `full` считаются только новые и изменённые записи. Старые записи
+    получают в соседи новые при полном пересчёте. Поиск приближённый:
+    у записи, для которой ищутся соседи, остаются `query_terms` самых
+    весомых слов, что в разы сокращает произведение матриц; 0 — точный
+    поиск.
+    """
+    started = timezone.now()
+    stale = None if full else list(stale_posts())
+    ids, texts = [], []
+    for pk, text in Post.objects.order_by('pk').values_list(
+        'pk', 'text',
+    ).iterator():
+        ids.append(pk)
+        texts.append(text)
+    ids = np.array(ids, dtype=np.int64)
+    targets = ids if full else ids[np.isin(ids, stale)]
+    if not len(targets):
+        return 0
+    vectors = build_vectors(texts)
+    vectors_t = vectors.T.tocsr()
+    rows = np.searchsorted(ids, targets)
+    for start in range(0, len(rows), block_size):
+        block_rows = rows[start:start + block_size]
+        queries = vectors[block_rows]
+        if query_terms:
+            queries = keep_top(queries, query_terms)
+        scores = queries @ vectors_t
+        scores = sparse.csr_matrix(scores - scores.multiply(
+            sparse.csr_matrix(
+                (np.ones(len(block_rows)),
+                 (np.arange(len(block_rows)), block_rows)),
+                shape=scores.shape,
+            ),
+        ))
+        scores.data[scores.data < min_score] = 0
+        scores.eliminate_zeros()
+        block_ids = ids[block_rows].tolist()
+        related = [
+            RelatedPost(
+                post_id=block_ids[row],
+                related_id=int(ids[column]),
+                score=score,
+                computed=started,
+            )
+            for row, column, score in top_k(scores, k)
+        ]
+        # Блок записывается своей короткой транзакцией: база не
+        # блокируется на запись, пока считаются остальные блоки.
+        with transaction.atomic():
+            RelatedPost.objects.filter(post_id__in=block_ids).delete()
+            RelatedPost.objects.bulk_create(related, batch_size)
+            Post.objects.filter(pk__in=block_ids).update(
+                related_computed=started,
+            )
+    return len(targets)
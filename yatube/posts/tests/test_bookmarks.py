@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.fragments import bookmarks
+from posts.models import Bookmark, Post
+
+User = get_user_model()
+
+
+@override_settings(NUM_PAGES=2)
+class BookmarkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='author')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {i}', author=author)
+            for i in range(4)
+        ]
+        now = timezone.now()
+        # Первая и вторая закладки сделаны одновременно.
+        for post, minutes in zip(cls.posts[:3], (2, 2, 1)):
+            Bookmark.objects.create(user=cls.user, post=post,
+                                    created=now - timedelta(minutes=minutes))
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_indicator_for_page_in_one_query(self):
+        """Отметки закладок для всей страницы — один запрос."""
+        request = RequestFactory().get('/')
+        request.user = self.user
+        with self.assertNumQueries(1):
+            rendered = bookmarks(request, [
+                {'post': str(post.pk)} for post in self.posts
+            ])
+        self.assertEqual(
+            ['В закладках' in html for html in rendered],
+            [True, True, True, False],
+        )
+
+    def test_toggle(self):
+        """Повторное нажатие убирает запись из закладок."""
+        url = reverse('posts:post_bookmark',
+                      kwargs={'post_id': self.posts[3].pk})
+        self.client.post(url)
+        self.assertTrue(Bookmark.objects.filter(post=self.posts[3]).exists())
+        self.client.post(url)
+        self.assertFalse(Bookmark.objects.filter(post=self.posts[3]).exists())
+
+    def test_saved_feed_pages(self):
+        """Лента закладок листается по курсору без пропусков и повторов."""
+        url = reverse('posts:saved_posts')
+        first = self.client.get(url).context
+        self.assertEqual(first['posts'], [self.posts[2], self.posts[1]])
+        second = self.client.get(
+            url, {'after': first['page_obj'].next_cursor},
+        ).context
+        self.assertEqual(second['posts'], [self.posts[0]])
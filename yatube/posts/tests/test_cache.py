@@ -0,0 +1,164 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Post
+from posts.page_cache import CONTENT_VERSION_KEY
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.create(text='Первый пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.url = reverse('posts:index')
+
+    def test_page_served_from_cache(self):
+        """Повторный запрос гостя отдаётся из кэша без выполнения view."""
+        first = self.guest_client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.guest_client.get(self.url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertTrue(second.has_header('Last-Modified'))
+
+    def test_conditional_get(self):
+        """Клиент с актуальным ETag получает 304 без тела."""
+        etag = self.guest_client.get(self.url)['ETag']
+        response = self.guest_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_new_post_invalidates_cache(self):
+        """Новая запись сбрасывает кэш страниц."""
+        self.guest_client.get(self.url)
+        Post.objects.create(text='Второй пост', author=self.author)
+        response = self.guest_client.get(self.url)
+        self.assertContains(response, 'Второй пост')
+
+    def test_lost_version_does_not_revive_old_pages(self):
+        """Пропавшая версия не делает снова действительными старые страницы."""
+        self.guest_client.get(self.url)
+        Post.objects.create(text='Второй пост', author=self.author)
+        cache.delete(CONTENT_VERSION_KEY)
+        response = self.guest_client.get(self.url)
+        self.assertContains(response, 'Второй пост')
+
+    def test_page_parameter_in_key(self):
+        """Номер страницы входит в ключ, а прочие параметры — нет."""
+        self.guest_client.get(self.url)
+        with self.assertNumQueries(0):
+            self.guest_client.get(self.url, {'utm': 'feed'})
+        response = self.guest_client.get(self.url, {'page': 2})
+        self.assertIsNotNone(response.context)
+
+
+class AuthorizedPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.other = User.objects.create_user(username='other')
+        Post.objects.create(text='Первый пост', author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.other_client = Client()
+        self.other_client.force_login(self.other)
+        self.url = reverse('posts:profile', kwargs={'username': 'author'})
+
+    def test_shared_body_with_user_fragments(self):
+        """Тело страницы общее, а шапка и кнопка подписки — свои."""
+        self.reader_client.get(self.url)
+        response = self.other_client.get(self.url)
+        self.assertTemplateNotUsed(response, 'posts/profile.html')
+        self.assertContains(response, 'Пользователь: other')
+        self.assertContains(response, 'Подписаться')
+        self.assertNotContains(response, '<!--fragment')
+        response = self.reader_client.get(self.url)
+        self.assertContains(response, 'Пользователь: reader')
+        self.assertContains(response, 'Отписаться')
+
+    def test_guest_page_after_authorized(self):
+        """Гость получает страницу без фрагментов авторизованных."""
+        self.reader_client.get(self.url)
+        response = Client().get(self.url)
+        self.assertContains(response, 'Войти')
+        self.assertNotContains(response, 'Пользователь:')
+
+    def test_conditional_get_for_authorized(self):
+        """Авторизованный клиент с актуальным ETag получает 304."""
+        etag = self.reader_client.get(self.url)['ETag']
+        response = self.reader_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+
+class PostDetailConditionalTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Первый пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.url = reverse('posts:post_detail',
+                           kwargs={'post_id': self.post.id})
+
+    def test_not_modified_with_one_query(self):
+        """Неизменившаяся запись отдаёт 304 за один запрос к базе."""
+        etag = self.guest_client.get(self.url)['ETag']
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(
+                self.url, HTTP_IF_NONE_MATCH=etag,
+            )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_bookmark_changes_page_for_user(self):
+        """Закладка пользователя меняет ETag его страницы записи."""
+        etag = self.author_client.get(self.url)['ETag']
+        self.author_client.post(
+            reverse('posts:post_bookmark', kwargs={'post_id': self.post.id}),
+        )
+        response = self.author_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_comment_changes_validators(self):
+        """Новый комментарий меняет ETag страницы записи."""
+        etag = self.guest_client.get(self.url)['ETag']
+        self.author_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            {'text': 'Комментарий'},
+        )
+        response = self.guest_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_edit_changes_validators(self):
+        """Редактирование записи меняет ETag."""
+        etag = self.guest_client.get(self.url)['ETag']
+        self.author_client.post(
+            reverse('posts:post_edit', kwargs={'pk': self.post.id}),
+            {'text': 'Изменённый пост'},
+        )
+        response = self.guest_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.counters import post_views
+from posts.models import EngagementEvent, Post
+
+User = get_user_model()
+
+
+class PostViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {i}', author=author)
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        post_views.pending.clear()
+        # Иначе накопленное уйдёт в фоновую задачу, а не в базу.
+        patcher = mock.patch.object(post_views, 'flush_interval',
+                                    float('inf'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_views_are_buffered(self):
+        """Просмотры копятся в памяти и записываются одним запросом."""
+        client = Client()
+        url = reverse('posts:post_detail',
+                      kwargs={'post_id': self.posts[0].pk})
+        for _ in range(3):
+            client.get(url)
+        post_views.add(self.posts[1].pk, 2)
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).views, 0)
+        with self.assertNumQueries(5):
+            post_views.flush()
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('views', flat=True)),
+            [3, 2],
+        )
+        self.assertEqual(
+            EngagementEvent.objects.get(post=self.posts[0]).count, 3,
+        )
+
+    def test_cached_page_shows_current_views(self):
+        """Счётчик просмотров не застывает в закэшированной странице."""
+        author = Client()
+        author.force_login(User.objects.get(username='author'))
+        url = reverse('posts:post_detail',
+                      kwargs={'post_id': self.posts[0].pk})
+        for client in (Client(), author):
+            with self.subTest(authenticated=client is author):
+                cache.clear()
+                etag = client.get(url)['ETag']
+                Post.objects.filter(pk=self.posts[0].pk).update(views=10)
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertContains(response, 'Просмотров: 10')
+                Post.objects.filter(pk=self.posts[0].pk).update(views=0)
+
+    def test_failed_flush_keeps_values(self):
+        """При ошибке записи приращения остаются в буфере."""
+        post_views.add(self.posts[0].pk)
+        original, post_views.field = post_views.field, 'missing'
+        try:
+            with self.assertLogs('yatube', 'ERROR'):
+                post_views.flush()
+        finally:
+            post_views.field = original
+        post_views.flush()
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).views, 1)
@@ -0,0 +1,86 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail import get_connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from posts.digests import send_digests
+from posts.models import DigestLog, Follow, Post
+from posts.scheduling import publish_due
+
+User = get_user_model()
+
+
+@override_settings(DIGEST_BATCH_SIZE=2, DIGEST_SEND_CHUNK=1,
+                   DIGEST_MAX_POSTS=2)
+class DigestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.readers = [
+            User.objects.create_user(username=f'reader{i}',
+                                     email=f'reader{i}@example.com')
+            for i in range(3)
+        ]
+        no_email = User.objects.create_user(username='noemail')
+        Follow.objects.bulk_create(
+            Follow(user=user, author=cls.author)
+            for user in [*cls.readers, no_email]
+        )
+        Follow.objects.create(user=cls.readers[0], author=cls.other)
+        cls.posts = [
+            Post.objects.create(text=f'Запись {i}', author=cls.author)
+            for i in range(2)
+        ]
+        cls.other_post = Post.objects.create(text='Чужая', author=cls.other)
+
+    def test_digest_per_follower_through_one_connection(self):
+        """Каждый подписчик с почтой получает одно письмо о новых записях."""
+        connection = get_connection()
+        with mock.patch.object(
+            connection, 'send_messages', wraps=connection.send_messages,
+        ) as send_messages:
+            self.assertEqual(send_digests('daily', connection), 3)
+        self.assertEqual(send_messages.call_count, 3)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            [user.email for user in self.readers],
+        )
+        first = next(message for message in mail.outbox
+                     if message.to == [self.readers[0].email])
+        self.assertIn('Чужая', first.body)
+        self.assertIn('Запись 1', first.body)
+        self.assertIn('И ещё записей: 1', first.body)
+        self.assertEqual(
+            DigestLog.objects.get(user=self.readers[0]).last_published,
+            self.other_post.pub_date,
+        )
+
+    def test_rerun_sends_only_new_posts(self):
+        """Повторный запуск не присылает уже отправленные записи."""
+        send_digests('daily')
+        mail.outbox.clear()
+        self.assertEqual(send_digests('daily'), 0)
+        Post.objects.create(text='Совсем новая', author=self.other)
+        self.assertEqual(send_digests('daily'), 1)
+        self.assertEqual(mail.outbox[0].to, [self.readers[0].email])
+        self.assertNotIn('Чужая', mail.outbox[0].body)
+        self.assertEqual(send_digests('weekly'), 3)
+
+    def test_late_publication_after_checkpoint_is_sent(self):
+        """Запись, опубликованная с опозданием, уходит в следующей подборке."""
+        scheduled = Post.objects.create(
+            text='Запланированная', author=self.other, is_published=False,
+            publish_at=timezone.now() - timedelta(minutes=5),
+        )
+        Post.objects.create(text='Опубликованная', author=self.other)
+        send_digests('daily')
+        mail.outbox.clear()
+        self.assertEqual(publish_due(), 1)
+        self.assertEqual(send_digests('daily'), 1)
+        self.assertIn('Запланированная', mail.outbox[0].body)
+        self.assertTrue(Post.objects.get(pk=scheduled.pk).is_published)
@@ -0,0 +1,126 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow
+from posts.utils import following_authors
+
+User = get_user_model()
+
+
+class FollowingAuthorsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(3)
+        ]
+        Follow.objects.create(user=cls.user, author=cls.authors[0])
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.request.user = self.user
+
+    def test_one_query_and_memo(self):
+        """Состояние подписки на всех авторов — один запрос за запрос."""
+        ids = [author.id for author in self.authors]
+        with self.assertNumQueries(1):
+            self.assertEqual(following_authors(self.request, ids), {ids[0]})
+            self.assertEqual(
+                following_authors(self.request, ids[:2]), {ids[0]},
+            )
+
+
+@override_settings(NUM_PAGES=2)
+class FollowListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.followers = [
+            User.objects.create_user(username=f'follower{i}')
+            for i in range(5)
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=follower, author=cls.author)
+            for follower in cls.followers
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.followers[0])
+        self.url = reverse('posts:follower_list',
+                           kwargs={'username': self.author.username})
+
+    def test_keyset_pages_cover_all_followers(self):
+        """Страницы по курсору проходят всех подписчиков без повторов."""
+        seen = []
+        url = self.url
+        while url:
+            page_obj = self.client.get(url).context['page_obj']
+            seen.extend(follow.user.username for follow in page_obj)
+            url = page_obj.has_next and (
+                f'{self.url}?after={page_obj.next_cursor}'
+            )
+        self.assertEqual(
+            seen, [follower.username for follower in reversed(self.followers)],
+        )
+
+    def test_queries_do_not_depend_on_page(self):
+        """Число запросов одинаково на первой и последующих страницах."""
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get(self.url)
+        cursor = response.context['page_obj'].next_cursor
+        with CaptureQueriesContext(connection) as second:
+            self.client.get(f'{self.url}?after={cursor}')
+        self.assertEqual(len(first), len(second))
+
+    def test_following_list(self):
+        """Список подписок показывает авторов пользователя."""
+        response = self.client.get(reverse(
+            'posts:following_list',
+            kwargs={'username': self.followers[0].username},
+        ))
+        self.assertEqual(response.context['users'], [self.author])
+        self.assertContains(response, 'Отписаться')
+
+
+class BulkFollowTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(3)
+        ]
+        Follow.objects.create(user=cls.user, author=cls.authors[0])
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('posts:bulk_follow')
+
+    def test_bulk_follow(self):
+        """Подписка на всех авторов сразу, повторы и себя пропускает."""
+        usernames = ' '.join(
+            [author.username for author in self.authors]
+            + [self.user.username, 'missing'],
+        )
+        response = self.client.post(self.url, {'usernames': usernames})
+        self.assertRedirects(response, reverse('posts:follow_index'))
+        self.assertQuerysetEqual(
+            Follow.objects.filter(user=self.user).order_by('author_id'),
+            [author.id for author in self.authors],
+            transform=lambda follow: follow.author_id,
+        )
+
+    def test_bulk_unfollow(self):
+        """Отписка от нескольких авторов одним запросом."""
+        self.client.post(self.url, {
+            'usernames': f'{self.authors[0].username},{self.authors[1]}',
+            'unfollow': 'on',
+        })
+        self.assertFalse(Follow.objects.filter(user=self.user).exists())
@@ -0,0 +1,84 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import live
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(COMMENT_STREAM_POLL=0.01, COMMENT_STREAM_HEARTBEAT=5,
+                   COMMENT_STREAM_TIMEOUT=5)
+class LiveCommentsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+        cls.first = Comment.objects.create(
+            text='Первый', author=cls.user, post=cls.post,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def comment(self, text):
+        return Comment.objects.create(
+            text=text, author=self.user, post=self.post,
+        )
+
+    def test_feed_since_cursor(self):
+        """Лента отдаёт только комментарии после курсора."""
+        second = self.comment('Второй')
+        response = Client().get(
+            reverse('posts:comments_feed', kwargs={'post_id': self.post.pk}),
+            {'since': self.first.pk},
+        )
+        data = response.json()
+        self.assertEqual([item['text'] for item in data['comments']],
+                         ['Второй'])
+        self.assertEqual(data['cursor'], second.pk)
+
+    def test_stream_pushes_new_comments(self):
+        """Поток отдаёт новые комментарии после смены версии в кэше."""
+        response = Client().get(
+            reverse('posts:comments_stream',
+                    kwargs={'post_id': self.post.pk}),
+            HTTP_LAST_EVENT_ID=str(self.first.pk),
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = iter(response.streaming_content)
+        self.assertTrue(next(events).startswith(b'retry:'))
+        second = self.comment('Второй')
+        message = next(events).decode()
+        self.assertIn(f'id: {second.pk}', message)
+        data = json.loads(message.split('data: ', 1)[1])
+        self.assertEqual(data['text'], 'Второй')
+        response.close()
+
+    def test_stream_wakes_on_comment_during_wait(self):
+        """Комментарий, появившийся во время ожидания, будит поток."""
+        real_wait = live.hub.wait
+        created = []
+
+        def wait(post_id, version, timeout):
+            if not created:
+                created.append(self.comment('Во время ожидания'))
+            return real_wait(post_id, version, timeout)
+
+        response = Client().get(
+            reverse('posts:comments_stream',
+                    kwargs={'post_id': self.post.pk}),
+            HTTP_LAST_EVENT_ID=str(self.first.pk),
+        )
+        events = iter(response.streaming_content)
+        next(events)
+        with mock.patch.object(live.hub, 'wait', side_effect=wait) as patched:
+            message = next(events).decode()
+        self.assertEqual(patched.call_count, 1)
+        self.assertIn(f'id: {created[0].pk}', message)
+        response.close()
@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import (Comment, Follow, Notification, NotificationCounter,
+                          Post)
+from posts.notifications import fan_out_post, notify_comment, unread_count
+
+User = get_user_model()
+
+
+@override_settings(NOTIFICATION_BATCH_SIZE=2, NUM_PAGES=2)
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.followers = [
+            User.objects.create_user(username=f'reader{i}') for i in range(5)
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=user, author=cls.author) for user in cls.followers
+        )
+        # Рассылка выполняется после фиксации транзакции,
+        # которой в тестах нет, поэтому здесь её вызывают явно.
+        cls.post = Post.objects.create(text='Новая запись', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fan_out_in_batches(self):
+        """Каждый подписчик получает одно уведомление пачками."""
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(fan_out_post(self.post.pk), 5)
+        inserts = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('INSERT INTO "posts_notification" ')
+        ]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(
+            set(Notification.objects.values_list('recipient_id', flat=True)),
+            {user.pk for user in self.followers},
+        )
+        self.assertFalse(
+            Notification.objects.filter(recipient=self.author).exists()
+        )
+        self.assertEqual(unread_count(self.followers[0].pk), 1)
+
+    def test_comment_notifies_post_and_parent_authors(self):
+        """Ответ уведомляет автора записи и автора комментария, не себя."""
+        reader, other = self.followers[:2]
+        parent = Comment.objects.create(post=self.post, author=reader,
+                                        text='Вопрос')
+        reply = Comment.objects.create(post=self.post, author=other,
+                                       text='Ответ', parent=parent)
+        self.assertEqual(notify_comment(reply.pk), 2)
+        kinds = dict(Notification.objects.values_list('recipient_id', 'kind'))
+        self.assertEqual(kinds, {
+            reader.pk: Notification.REPLY,
+            self.author.pk: Notification.COMMENT,
+        })
+        own = Comment.objects.create(post=self.post, author=self.author,
+                                     text='Спасибо')
+        self.assertEqual(notify_comment(own.pk), 0)
+
+    def test_inbox_pages_and_marks_read(self):
+        """Входящие листаются по курсору, первая страница читает всё."""
+        reader = self.followers[0]
+        for _ in range(2):
+            post = Post.objects.create(text='Ещё', author=self.author)
+            fan_out_post(post.pk)
+        fan_out_post(self.post.pk)
+        self.assertEqual(unread_count(reader.pk), 3)
+        client = Client()
+        client.force_login(reader)
+        response = client.get(reverse('posts:notifications'))
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 2)
+        self.assertEqual(unread_count(reader.pk), 0)
+        self.assertEqual(
+            NotificationCounter.objects.get(user=reader).unread, 0,
+        )
+        response = client.get(
+            reverse('posts:notifications'),
+            {'after': page_obj.next_cursor},
+        )
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertFalse(response.context['page_obj'].has_next)
@@ -0,0 +1,150 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.counters import post_views
+from posts.models import (Bookmark, Comment, Follow, Group, Notification,
+                          Post, TrendingScore)
+from posts.urls import urlpatterns
+
+User = get_user_model()
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Первый пост',
+            author=cls.author,
+            group=cls.group,
+        )
+        cls.comment = Comment.objects.create(
+            text='Первый комментарий',
+            author=cls.user,
+            post=cls.post,
+        )
+        Comment.objects.create(
+            text='Первый ответ',
+            author=cls.author,
+            post=cls.post,
+            parent=cls.comment,
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        TrendingScore.objects.create(post=cls.post, score=1)
+        Bookmark.objects.create(user=cls.user, post=cls.post)
+        Notification.objects.create(
+            recipient=cls.user, actor=cls.author,
+            kind=Notification.NEW_POST, post=cls.post,
+        )
+        cls.budgets = {
+            pattern.name: pattern.callback.query_budget
+            for pattern in urlpatterns
+        }
+        cls.pages = {
+            'index': reverse('posts:index'),
+            'group_list': reverse('posts:group_list',
+                                  kwargs={'slug': cls.group.slug}),
+            'profile': reverse('posts:profile',
+                               kwargs={'username': cls.author.username}),
+            'post_detail': reverse('posts:post_detail',
+                                   kwargs={'post_id': cls.post.id}),
+            'follow_index': reverse('posts:follow_index'),
+            'trending': reverse('posts:trending'),
+            'saved_posts': reverse('posts:saved_posts'),
+            'notifications': reverse('posts:notifications'),
+            'follower_list': reverse(
+                'posts:follower_list',
+                kwargs={'username': cls.author.username},
+            ),
+            'following_list': reverse(
+                'posts:following_list',
+                kwargs={'username': cls.user.username},
+            ),
+            'comment_thread': reverse(
+                'posts:comment_thread',
+                kwargs={'comment_id': cls.comment.id},
+            ),
+        }
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def count_queries(self, url):
+        cache.clear()
+        # Сброс счётчика просмотров не относится к странице.
+        with mock.patch.object(post_views, 'flush_interval', float('inf')):
+            with CaptureQueriesContext(connection) as queries:
+                self.authorized_client.get(url)
+        return len(queries)
+
+    def fill(self, count):
+        """Доводит число строк каждой страницы до `count`."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.author, group=self.group)
+            for i in range(count - 1)
+        )
+        posts = list(Post.objects.exclude(pk=self.post.pk))
+        Comment.objects.bulk_create(
+            Comment(text=f'Комментарий {i}', author=self.user,
+                    post=self.post)
+            for i in range(count - 1)
+        )
+        for i in range(count - 1):
+            Comment.objects.create(
+                text=f'Ответ {i}', author=self.author, post=self.post,
+                parent=self.comment,
+            )
+        TrendingScore.objects.bulk_create(
+            TrendingScore(post=post, score=0) for post in posts
+        )
+        Bookmark.objects.bulk_create(
+            Bookmark(user=self.user, post=post) for post in posts
+        )
+        Notification.objects.bulk_create(
+            Notification(recipient=self.user, actor=self.author,
+                         kind=Notification.NEW_POST, post=post)
+            for post in posts
+        )
+        User.objects.bulk_create(
+            User(username=f'user{i}') for i in range(count - 1)
+        )
+        users = User.objects.filter(username__startswith='user')
+        Follow.objects.bulk_create(
+            Follow(user=user, author=self.author) for user in users
+        )
+        Follow.objects.bulk_create(
+            Follow(user=self.user, author=user) for user in users
+        )
+
+    def test_all_urls_have_budget(self):
+        """У каждого адреса приложения posts задан бюджет запросов."""
+        for name, budget in self.budgets.items():
+            with self.subTest(name=name):
+                self.assertIsInstance(budget, int)
+
+    def test_queries_do_not_grow_with_page_size(self):
+        """Число запросов не зависит от количества записей на странице."""
+        single = {
+            name: self.count_queries(url)
+            for name, url in self.pages.items()
+        }
+        self.fill(50)
+        for name, url in self.pages.items():
+            with self.subTest(name=name):
+                many = self.count_queries(url)
+                self.assertEqual(many, single[name])
+                self.assertLessEqual(many, self.budgets[name])
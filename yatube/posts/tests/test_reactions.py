@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.counters import comment_reactions, post_reactions
+from posts.models import Comment, Post, Reaction
+from posts.reactions import reaction_states, toggle
+
+User = get_user_model()
+
+
+class ReactionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='author')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {i}', author=author)
+            for i in range(3)
+        ]
+        cls.comment = Comment.objects.create(
+            text='Комментарий', author=author, post=cls.posts[0],
+        )
+
+    def setUp(self):
+        cache.clear()
+        for counter in (post_reactions, comment_reactions):
+            counter.pending.clear()
+            # Иначе накопленное уйдёт в фоновую задачу, а не в базу.
+            patcher = mock.patch.object(counter, 'flush_interval',
+                                        float('inf'))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_toggle(self):
+        """Повтор снимает реакцию, другой вид заменяет её без счёта."""
+        pk = self.posts[0].pk
+        self.assertEqual(toggle(self.user, 'post', pk, 'like'), 'like')
+        self.assertEqual(toggle(self.user, 'post', pk, 'heart'), 'heart')
+        self.assertEqual(post_reactions.unflushed(pk), 1)
+        self.assertIsNone(toggle(self.user, 'post', pk, 'heart'))
+        self.assertEqual(post_reactions.unflushed(pk), 0)
+        self.assertFalse(Reaction.objects.exists())
+
+    def test_states_for_page_in_two_queries(self):
+        """Счётчики и свои реакции для всей страницы — два запроса."""
+        toggle(self.user, 'post', self.posts[1].pk, 'laugh')
+        post_reactions.flush()
+        ids = [post.pk for post in self.posts]
+        with self.assertNumQueries(2):
+            states = reaction_states(self.user, 'post', ids)
+        self.assertEqual(states[self.posts[1].pk], (1, 'laugh'))
+        self.assertEqual(states[self.posts[0].pk], (0, None))
+
+    def test_react_endpoints(self):
+        """Реакция через форму возвращает читателя на страницу."""
+        client = Client()
+        client.force_login(self.user)
+        index = reverse('posts:index')
+        response = client.post(
+            reverse('posts:post_react', kwargs={'post_id': self.posts[2].pk}),
+            {'kind': 'like', 'next': index},
+        )
+        self.assertRedirects(response, index)
+        response = client.post(
+            reverse('posts:comment_react',
+                    kwargs={'comment_id': self.comment.pk}),
+            {'kind': 'heart', 'next': 'https://example.com/'},
+        )
+        self.assertRedirects(response, reverse(
+            'posts:post_detail', kwargs={'post_id': self.posts[0].pk},
+        ))
+        comment_reactions.flush()
+        self.assertEqual(
+            Comment.objects.get(pk=self.comment.pk).reactions_count, 1,
+        )
+        self.assertContains(client.get(index), 'btn-primary">👍')
@@ -0,0 +1,67 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, FollowSuggestion
+
+User = get_user_model()
+
+
+class FollowSuggestionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('anna', 'boris', 'vera', 'gleb', 'dina')
+        }
+        edges = (
+            ('anna', 'boris'),
+            ('boris', 'vera'),
+            ('boris', 'anna'),
+            ('gleb', 'boris'),
+            ('gleb', 'dina'),
+        )
+        Follow.objects.bulk_create(
+            Follow(user=cls.users[user], author=cls.users[author])
+            for user, author in edges
+        )
+
+    def suggested(self, name):
+        return list(FollowSuggestion.objects.filter(
+            user=self.users[name],
+        ).order_by('-score').values_list('author__username', flat=True))
+
+    def test_friends_of_friends_and_co_follow(self):
+        """Друзья друзей идут выше совместных подписок, свои не попадают."""
+        call_command('build_follow_suggestions', '--block-size=2',
+                     stdout=StringIO())
+        self.assertEqual(self.suggested('anna'), ['vera', 'dina'])
+        self.assertNotIn('anna', self.suggested('boris'))
+        self.assertNotIn('boris', self.suggested('boris'))
+
+    def test_rebuild_drops_users_without_follows(self):
+        """Пересчёт удаляет рекомендации тех, кто отписался от всех."""
+        call_command('build_follow_suggestions', '--block-size=2',
+                     stdout=StringIO())
+        self.assertTrue(self.suggested('gleb'))
+        Follow.objects.filter(user=self.users['gleb']).delete()
+        call_command('build_follow_suggestions', '--block-size=2',
+                     stdout=StringIO())
+        self.assertEqual(self.suggested('gleb'), [])
+        self.assertEqual(self.suggested('anna'), ['vera'])
+
+    def test_follow_index_shows_suggestions(self):
+        """Лента подписок показывает ещё не прочитанных авторов."""
+        call_command('build_follow_suggestions', stdout=StringIO())
+        Follow.objects.create(user=self.users['anna'],
+                              author=self.users['dina'])
+        client = Client()
+        client.force_login(self.users['anna'])
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [item.author for item in response.context['suggestions']],
+            [self.users['vera']],
+        )
@@ -0,0 +1,126 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Job
+from posts.models import Bookmark, Follow, Group, Post, Reaction
+from posts.page_cache import content_version
+from posts.scheduling import publish_due
+
+User = get_user_model()
+
+
+class ScheduledPublishingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def create_scheduled(self, minutes=30):
+        publish_at = timezone.localtime() + timedelta(minutes=minutes)
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Запланированная запись',
+            'group': self.group.pk,
+            'publish_at': publish_at.strftime('%Y-%m-%dT%H:%M'),
+        })
+        return Post.objects.get(text='Запланированная запись')
+
+    def test_scheduled_post_is_hidden_from_feeds(self):
+        """До публикации запись не видна ни в одной ленте."""
+        post = self.create_scheduled()
+        self.assertFalse(post.is_published)
+        reader = Client()
+        reader.force_login(self.reader)
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:follow_index'),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    len(reader.get(url).context['page_obj']), 0,
+                )
+        response = reader.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        # Публикация поставлена на время записи, рассылка — ещё нет.
+        job = Job.objects.get()
+        self.assertEqual(job.name, 'posts.publish_due')
+        self.assertGreater(job.run_at, timezone.now() + timedelta(minutes=28))
+
+    def test_scheduled_post_cannot_be_reacted_or_saved(self):
+        """До публикации запись нельзя отметить и её нет в закладках."""
+        post = self.create_scheduled()
+        reader = Client()
+        reader.force_login(self.reader)
+        for url, data in (
+            (reverse('posts:post_react', kwargs={'post_id': post.pk}),
+             {'kind': 'like'}),
+            (reverse('posts:post_bookmark', kwargs={'post_id': post.pk}), {}),
+        ):
+            with self.subTest(url=url):
+                response = reader.post(url, data)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertFalse(Reaction.objects.exists())
+        self.assertFalse(Bookmark.objects.exists())
+        # Закладка, сделанная до снятия записи с публикации.
+        Bookmark.objects.create(user=self.reader, post=post)
+        response = reader.get(reverse('posts:saved_posts'))
+        self.assertEqual(response.context['posts'], [])
+
+    def test_publish_due_flips_posts_in_batches(self):
+        """Планировщик публикует наступившие записи и ставит рассылку."""
+        post = self.create_scheduled()
+        later = Post.objects.create(
+            text='Позже', author=self.author, is_published=False,
+            publish_at=timezone.now() + timedelta(hours=1),
+        )
+        self.assertEqual(publish_due(), 0)
+        Post.objects.filter(pk=post.pk).update(
+            publish_at=timezone.now() - timedelta(minutes=1),
+        )
+        Post.objects.create(
+            text='Тоже пора', author=self.author, is_published=False,
+            publish_at=timezone.now() - timedelta(minutes=2),
+        )
+        version = content_version()
+        started = timezone.now()
+        with self.settings(PUBLISH_BATCH_SIZE=1):
+            self.assertEqual(publish_due(), 2)
+        post.refresh_from_db()
+        self.assertTrue(post.is_published)
+        # Опоздавшая задача не переносит запись в прошлое.
+        self.assertGreaterEqual(post.pub_date, started)
+        self.assertFalse(Post.objects.get(pk=later.pk).is_published)
+        self.assertNotEqual(content_version(), version)
+        self.assertTrue(Job.objects.filter(
+            name='posts.fan_out_post', dedup_key=f'fan_out_post:{post.pk}',
+        ).exists())
+        self.assertEqual(
+            len(self.client.get(reverse('posts:index')).context['page_obj']),
+            2,
+        )
+
+    def test_past_publish_time_is_rejected(self):
+        """Время публикации в прошлом — ошибка формы."""
+        response = self.client.post(reverse('posts:post_create'), {
+            'text': 'Запись',
+            'publish_at': '2000-01-01T00:00',
+        })
+        self.assertFalse(Post.objects.exists())
+        self.assertTrue(response.context['schedule_form'].errors)
+        self.assertEqual(len(response.context['form'].fields), 3)
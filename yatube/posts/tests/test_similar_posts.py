@@ -0,0 +1,91 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Post, RelatedPost
+
+User = get_user_model()
+
+
+class RelatedPostsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        texts = (
+            'Рецепт борща со свёклой и капустой',
+            'Борщ без свёклы: рецепт зелёного борща',
+            'Ремонт велосипеда: меняем цепь и звёзды',
+            'Как смазать цепь велосипеда перед сезоном',
+        )
+        cls.posts = [
+            Post.objects.create(text=text, author=author) for text in texts
+        ]
+
+    def related(self, post):
+        return list(post.related.order_by('-score').values_list(
+            'related_id', flat=True,
+        ))
+
+    def test_neighbours_by_text(self):
+        """Соседи находятся по общим словам, сама запись не попадает."""
+        call_command('build_related_posts', stdout=StringIO())
+        self.assertEqual(self.related(self.posts[0]), [self.posts[1].pk])
+        self.assertEqual(self.related(self.posts[3]), [self.posts[2].pk])
+
+    def test_incremental_refresh(self):
+        """Повторный запуск пересчитывает только изменённые записи."""
+        call_command('build_related_posts', stdout=StringIO())
+        computed = RelatedPost.objects.get(post=self.posts[0]).computed
+        post = self.posts[2]
+        post.text = 'Рецепт борща на зиму'
+        post.edited = timezone.now()
+        post.save()
+        output = StringIO()
+        call_command('build_related_posts', stdout=output)
+        self.assertIn('Обновлено записей: 1 ', output.getvalue())
+        self.assertEqual(self.related(post)[0], self.posts[0].pk)
+        self.assertEqual(
+            RelatedPost.objects.get(post=self.posts[0]).computed, computed,
+        )
+
+    def test_post_without_neighbours_is_not_stale(self):
+        """Запись без похожих не пересчитывается при каждом запуске."""
+        lonely = Post.objects.create(
+            text='Совсем другая тема', author=self.posts[0].author,
+        )
+        call_command('build_related_posts', stdout=StringIO())
+        self.assertEqual(self.related(lonely), [])
+        output = StringIO()
+        call_command('build_related_posts', stdout=output)
+        self.assertIn('Обновлено записей: 0 ', output.getvalue())
+
+    def test_comment_does_not_make_post_stale(self):
+        """Комментарий не вызывает пересчёт похожих записей."""
+        call_command('build_related_posts', stdout=StringIO())
+        client = Client()
+        client.force_login(self.posts[0].author)
+        client.post(
+            reverse('posts:add_comment',
+                    kwargs={'post_id': self.posts[0].pk}),
+            {'text': 'Комментарий'},
+        )
+        output = StringIO()
+        call_command('build_related_posts', stdout=output)
+        self.assertIn('Обновлено записей: 0 ', output.getvalue())
+
+    def test_post_detail_shows_related(self):
+        """Страница записи показывает похожие записи."""
+        call_command('build_related_posts', stdout=StringIO())
+        cache.clear()
+        response = Client().get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.posts[0].pk},
+        ))
+        self.assertEqual(
+            [item.related for item in response.context['related_posts']],
+            [self.posts[1]],
+        )
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def comment(self, text, parent=None):
+        return Comment.objects.create(
+            text=text, author=self.user, post=self.post, parent=parent,
+        )
+
+    def test_thread_order_and_subtree(self):
+        """Сортировка по пути даёт обход ветки, поддерево — один запрос."""
+        first = self.comment('A')
+        reply = self.comment('B', first)
+        self.comment('C', reply)
+        self.comment('D')
+        self.comment('E', first)
+        self.assertEqual(
+            list(self.post.comments.order_by('path').values_list(
+                'text', flat=True)),
+            ['A', 'B', 'C', 'E', 'D'],
+        )
+        with self.assertNumQueries(1):
+            texts = [comment.text for comment in first.subtree()]
+        self.assertEqual(texts, ['B', 'C', 'E'])
+        first.refresh_from_db()
+        self.assertEqual(first.replies_count, 3)
+
+    @override_settings(COMMENT_MAX_DEPTH=1)
+    def test_depth_limit(self):
+        """Ответ глубже предела остаётся в ветке на предельной глубине."""
+        first = self.comment('A')
+        reply = self.comment('B', first)
+        deep = self.comment('C', reply)
+        self.assertEqual((deep.depth, deep.parent), (1, first))
+
+    def test_reply_through_form(self):
+        """Ответ отправляется формой комментария с полем parent."""
+        first = self.comment('A')
+        client = Client()
+        client.force_login(self.user)
+        client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Ответ', 'parent': first.pk},
+        )
+        self.assertEqual(Comment.objects.get(text='Ответ').parent, first)
+
+    @override_settings(COMMENT_EXPANDED_DEPTH=1)
+    def test_collapsed_subtrees(self):
+        """Глубокие ответы свёрнуты на странице записи и видны в ветке."""
+        first = self.comment('A')
+        reply = self.comment('B', first)
+        self.comment('C', reply)
+        client = Client()
+        response = client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['A', 'B'],
+        )
+        self.assertContains(response, 'Ещё ответов: 1')
+        response = client.get(
+            reverse('posts:comment_thread', kwargs={'comment_id': reply.pk}),
+        )
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['C'],
+        )
@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Comment, EngagementEvent, Post, TrendingScore
+from posts.trending import log_add, log_weight, update_scores
+
+User = get_user_model()
+
+
+@override_settings(TRENDING_HALF_LIFE=60 * 60, NUM_PAGES=2)
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {i}', author=cls.user)
+            for i in range(3)
+        ]
+
+    def test_decay(self):
+        """Событие часом позже весит вдвое больше при периоде в час."""
+        now = timezone.now()
+        self.assertAlmostEqual(
+            log_weight(1, now + timedelta(hours=1)),
+            log_add(log_weight(1, now), log_weight(1, now)),
+        )
+
+    def test_update_consumes_events(self):
+        """Буфер переносится в оценки и очищается, вклады складываются."""
+        Comment.objects.create(post=self.posts[0], author=self.user,
+                               text='Комментарий')
+        EngagementEvent.objects.create(post=self.posts[1],
+                                       kind=EngagementEvent.VIEW, count=3)
+        self.assertEqual(update_scores(), 2)
+        self.assertFalse(EngagementEvent.objects.exists())
+        first = TrendingScore.objects.get(post=self.posts[0]).score
+        Comment.objects.create(post=self.posts[0], author=self.user,
+                               text='Ещё комментарий')
+        update_scores()
+        self.assertGreater(
+            TrendingScore.objects.get(post=self.posts[0]).score, first,
+        )
+
+    def test_feed_order_and_pages(self):
+        """Лента упорядочена по оценке и листается по курсору."""
+        for count, post in zip((1, 5, 3), self.posts):
+            EngagementEvent.objects.create(
+                post=post, kind=EngagementEvent.VIEW, count=count,
+            )
+        update_scores()
+        client = Client()
+        url = reverse('posts:trending')
+        first = client.get(url).context
+        self.assertEqual(first['posts'], [self.posts[1], self.posts[2]])
+        cursor = first['page_obj'].next_cursor
+        second = client.get(url, {'after': cursor}).context
+        self.assertEqual(second['posts'], [self.posts[0]])
+        self.assertFalse(second['page_obj'].has_next)
@@ -1,6 +1,7 @@
 from http import HTTPStatus
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -47,6 +48,9 @@ class PostsUrlsTests(TestCase):
                 'pk': cls.post.id}),
         }
 
+    def setUp(self):
+        cache.clear()
+
     def test_http_statuses(self) -> None:
         httpstatuses = (
             (self.urls.get('group_list'), HTTPStatus.OK,
@@ -107,6 +111,7 @@ class PostsUrlsTests(TestCase):
 
         for url, template_name, client in templates:
             with self.subTest():
+                cache.clear()
                 self.assertTemplateUsed(client.get(url), template_name)
 
     def test_redirects(self) -> None:
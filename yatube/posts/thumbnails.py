@@ -0,0 +1,17 @@
+from sorl.thumbnail import get_thumbnail
+
+from core import jobs
+
+from .models import Post
+
+# Те же параметры, что у тега thumbnail в шаблонах записей.
+POST_IMAGE_GEOMETRY = '960x339'
+POST_IMAGE_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+@jobs.register('posts.make_thumbnail')
+def make_thumbnail(post_id):
+    """Создаёт миниатюру заранее, чтобы её не рендерил первый читатель."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is not None and post.image:
+        get_thumbnail(post.image, POST_IMAGE_GEOMETRY, **POST_IMAGE_OPTIONS)
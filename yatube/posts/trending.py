@@ -0,0 +1,89 @@
+"""
+Популярные записи.
+
+Оценка записи — сумма весов её событий, каждое из которых затухает
+вдвое за `TRENDING_HALF_LIFE` секунд. Вместо того чтобы уменьшать все
+оценки со временем, вклад события увеличивается: событие в момент t
+весит w·exp(λ(t − t0)) с постоянной эпохой t0. Порядок записей от этого
+не меняется, а оценку нужно обновлять только у записей с новыми
+событиями. Значения хранятся в виде логарифма, чтобы не переполниться.
+"""
+import math
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EngagementEvent, TrendingScore
+
+EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+def decay_rate():
+    return math.log(2) / settings.TRENDING_HALF_LIFE
+
+
+def log_weight(weight, moment):
+    """Логарифм вклада события с весом `weight` в момент `moment`."""
+    return math.log(weight) + decay_rate() * (
+        (moment - EPOCH).total_seconds()
+    )
+
+
+def log_add(left, right):
+    """log(exp(left) + exp(right)) без переполнения."""
+    if left < right:
+        left, right = right, left
+    return left + math.log1p(math.exp(right - left))
+
+
+def record_event(post_id, kind, count=1):
+    """Добавляет событие в буфер; оценки пересчитывает `update_trending`."""
+    EngagementEvent.objects.create(post_id=post_id, kind=kind, count=count)
+
+
+def update_scores(batch_size=1_000):
+    """
+    Переносит накопленные события в оценки; возвращает число событий.
+
+    События читаются до зафиксированного максимального id и удаляются
+    в той же транзакции, поэтому событие, добавленное во время работы,
+    попадёт в следующий запуск. Записи, чья оценка опустилась ниже
+    `TRENDING_MIN_WEIGHT` на текущий момент, удаляются из списка.
+    """
+    weights = settings.TRENDING_WEIGHTS
+    with transaction.atomic():
+        last_id = EngagementEvent.objects.order_by('-pk').values_list(
+            'pk', flat=True,
+        ).first()
+        if last_id is None:
+            return 0
+        events = EngagementEvent.objects.filter(pk__lte=last_id)
+        added = {}
+        processed = 0
+        for post_id, kind, count, created in events.values_list(
+            'post_id', 'kind', 'count', 'created',
+        ).iterator():
+            processed += 1
+            value = log_weight(weights[kind] * count, created)
+            current = added.get(post_id)
+            added[post_id] = (
+                value if current is None else log_add(current, value)
+            )
+        existing = TrendingScore.objects.in_bulk(list(added))
+        changed, new_rows = [], []
+        for post_id, value in added.items():
+            if post_id in existing:
+                row = existing[post_id]
+                row.score = log_add(row.score, value)
+                changed.append(row)
+            else:
+                new_rows.append(TrendingScore(post_id=post_id, score=value))
+        TrendingScore.objects.bulk_update(changed, ['score'], batch_size)
+        TrendingScore.objects.bulk_create(new_rows, batch_size)
+        events.delete()
+        TrendingScore.objects.filter(score__lt=log_weight(
+            settings.TRENDING_MIN_WEIGHT, timezone.now(),
+        )).delete()
+    return processed
@@ -1,27 +1,64 @@
 from django.urls import path
 
+from core.decorators import query_budget
+
 from . import views
 
 app_name = 'posts'
 
+# Бюджеты SQL-запросов на одну страницу: число запросов не должно
+# зависеть от количества записей на странице.
 urlpatterns = [
-    path('', views.index, name='index'),
-    path('create/', views.post_create, name='post_create'),
-    path('group/<slug:slug>/', views.group_posts, name='group_list'),
-    path('profile/<str:username>/', views.profile, name='profile'),
-    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
-    path('posts/<int:pk>/edit/', views.post_edit, name='post_edit'),
-    path('posts/<int:post_id>/comment/', views.add_comment,
+    path('', query_budget(8)(views.index), name='index'),
+    path('trending/', query_budget(7)(views.trending), name='trending'),
+    path('create/', query_budget(8)(views.post_create), name='post_create'),
+    path('group/<slug:slug>/', query_budget(8)(views.group_posts),
+         name='group_list'),
+    path('profile/<str:username>/', query_budget(11)(views.profile),
+         name='profile'),
+    path('posts/<int:post_id>/', query_budget(13)(views.post_detail),
+         name='post_detail'),
+    path('posts/<int:pk>/edit/', query_budget(8)(views.post_edit),
+         name='post_edit'),
+    path('posts/<int:post_id>/comment/', query_budget(9)(views.add_comment),
          name='add_comment'),
-    path('follow/', views.follow_index, name='follow_index'),
+    path('posts/<int:post_id>/comments/',
+         query_budget(3)(views.comments_feed), name='comments_feed'),
+    path('posts/<int:post_id>/comments/stream/',
+         query_budget(3)(views.comments_stream), name='comments_stream'),
+    path('comments/<int:comment_id>/', query_budget(9)(views.comment_thread),
+         name='comment_thread'),
+    path('posts/<int:post_id>/react/', query_budget(7)(views.post_react),
+         name='post_react'),
+    path('comments/<int:comment_id>/react/',
+         query_budget(7)(views.comment_react), name='comment_react'),
+    path('posts/<int:post_id>/bookmark/',
+         query_budget(7)(views.post_bookmark), name='post_bookmark'),
+    path('notifications/', query_budget(8)(views.notification_list),
+         name='notifications'),
+    path('saved/', query_budget(8)(views.saved_posts), name='saved_posts'),
+    path('follow/', query_budget(9)(views.follow_index),
+         name='follow_index'),
+    path('follow/bulk/', query_budget(7)(views.bulk_follow),
+         name='bulk_follow'),
     path(
         'profile/<str:username>/follow/',
-        views.profile_follow,
+        query_budget(7)(views.profile_follow),
         name='profile_follow',
     ),
     path(
         'profile/<str:username>/unfollow/',
-        views.profile_unfollow,
+        query_budget(6)(views.profile_unfollow),
         name='profile_unfollow',
     ),
+    path(
+        'profile/<str:username>/followers/',
+        query_budget(6)(views.follower_list),
+        name='follower_list',
+    ),
+    path(
+        'profile/<str:username>/following/',
+        query_budget(6)(views.following_list),
+        name='following_list',
+    ),
 ]
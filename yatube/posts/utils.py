@@ -1,5 +1,13 @@
 from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.shortcuts import get_object_or_404
+
+from .models import Follow, Group
+
+GROUP_CACHE_KEY = 'group:{}'
 
 
 def paginator(posts, request):
@@ -7,3 +15,114 @@ def paginator(posts, request):
     paginator = Paginator(posts, settings.NUM_PAGES)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+def get_group(slug):
+    """Сообщество по slug; метаданные сообществ берутся из кэша."""
+    key = GROUP_CACHE_KEY.format(slug)
+    group = cache.get(key)
+    if group is None:
+        group = get_object_or_404(Group, slug=slug)
+        cache.set(key, group, settings.GROUP_CACHE_TIMEOUT)
+    return group
+
+
+class KeysetPage:
+    """Страница ключевой пагинации: записи и курсор следующей страницы."""
+
+    def __init__(self, object_list, next_cursor, is_first):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or not self.is_first
+
+
+def _keyset_fields(model, ordering):
+    for name in ordering:
+        field_name = name.lstrip('-')
+        field = (
+            model._meta.pk if field_name == 'pk'
+            else model._meta.get_field(field_name)
+        )
+        yield field_name, field, name.startswith('-')
+
+
+def keyset_paginator(queryset, request, ordering=('-pk',), per_page=None):
+    """
+    Ключевая пагинация: страница начинается после курсора `?after=`.
+
+    В отличие от `paginator` не выполняет COUNT и OFFSET, поэтому любая
+    страница стоит одного запроса по индексу. Последнее поле `ordering`
+    должно быть уникальным.
+    """
+    per_page = per_page or settings.NUM_PAGES
+    fields = list(_keyset_fields(queryset.model, ordering))
+    queryset = queryset.order_by(*ordering)
+    cursor = request.GET.get('after')
+    if cursor:
+        try:
+            values = [
+                field.to_python(value)
+                for (_, field, _), value in zip(fields, cursor.split(','))
+            ]
+        except ValidationError:
+            values = []
+        if len(values) == len(fields):
+            condition = Q()
+            for index, (name, _, descending) in enumerate(fields):
+                lookup = {
+                    f'{name}__{"lt" if descending else "gt"}': values[index],
+                }
+                lookup.update(
+                    (previous, values[position])
+                    for position, (previous, _, _) in enumerate(
+                        fields[:index])
+                )
+                condition |= Q(**lookup)
+            queryset = queryset.filter(condition)
+    items = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        next_cursor = ','.join(
+            str(getattr(items[-1], field.attname))
+            for _, field, _ in fields
+        )
+    return KeysetPage(items, next_cursor, is_first=not cursor)
+
+
+def following_authors(request, author_ids):
+    """
+    Авторы из `author_ids`, на которых подписан текущий пользователь.
+
+    Состояние подписки для всех авторов страницы определяется одним
+    запросом по уникальному индексу (user, author) и запоминается
+    на время запроса.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return set()
+    memo = request.__dict__.setdefault('_following_memo', {})
+    missing = set(author_ids) - memo.keys()
+    if missing:
+        found = set(Follow.objects.filter(
+            user=user, author_id__in=missing,
+        ).values_list('author_id', flat=True))
+        memo.update((author_id, author_id in found) for author_id in missing)
+    return {author_id for author_id in author_ids if memo[author_id]}
@@ -1,32 +1,61 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
+from django.utils.http import is_safe_url
 
-from .forms import PostForm, CommentForm
-from .models import Follow, Group, Post
-from .utils import paginator
+from core.fragments import user_fragments
+
+from . import live, notifications
+from .counters import count_view
+from .forms import BulkFollowForm, PostForm, CommentForm, ScheduleForm
+from .models import (REACTION_KINDS, Bookmark, Comment, Follow,
+                     FollowSuggestion, Post, TrendingScore)
+from .page_cache import cached_page, content_version, post_not_modified
+from .reactions import toggle
+from .scheduling import schedule
+from .utils import get_group, keyset_paginator, paginator
 
 User = get_user_model()
 
 
+@cached_page
 def index(request):
-    posts = Post.objects.select_related('author', 'group').all()
-    return render(request, 'posts/index.html',
-                  {'page_obj': paginator(posts, request)})
+    posts = Post.objects.published().select_related('author', 'group')
+    return render(request, 'posts/index.html', {
+        'page_obj': paginator(posts, request),
+        'content_version': content_version(),
+    })
 
 
+@user_fragments
+def trending(request):
+    scores = TrendingScore.objects.select_related(
+        'post__author', 'post__group',
+    )
+    page_obj = keyset_paginator(scores, request, ordering=('-score', '-post'))
+    return render(request, 'posts/trending.html', {
+        'page_obj': page_obj,
+        'posts': [score.post for score in page_obj],
+    })
+
+
+@cached_page
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('author')
+    group = get_group(slug)
+    posts = group.posts.published().select_related('author')
     return render(request, 'posts/group_list.html', {
         'group': group,
         'page_obj': paginator(posts, request),
     })
 
 
+@cached_page
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = author.posts.select_related('group')
+    posts = author.posts.published().select_related('group')
     context = {
         'author': author,
         'page_obj': paginator(posts, request),
@@ -34,29 +63,100 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@count_view
+@post_not_modified
+@cached_page
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.published().select_related('author', 'group'),
+        pk=post_id)
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    comments = keyset_paginator(
+        post.comments.filter(
+            depth__lte=settings.COMMENT_EXPANDED_DEPTH,
+        ).select_related('author'),
+        request, ordering=('path',), per_page=settings.COMMENTS_PER_PAGE,
+    )
+    related_posts = post.related.filter(
+        related__is_published=True,
+    ).select_related('related__author').order_by('-score')
     context = {
         'post': post,
         'form': form,
         'comments': comments,
+        'expanded_depth': settings.COMMENT_EXPANDED_DEPTH,
+        'related_posts': related_posts,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@cached_page
+def comment_thread(request, comment_id):
+    comment = get_object_or_404(
+        Comment.objects.select_related('author', 'post'), pk=comment_id)
+    replies = keyset_paginator(
+        comment.subtree().select_related('author'),
+        request, ordering=('path',), per_page=settings.COMMENTS_PER_PAGE,
+    )
+    return render(request, 'posts/comment_thread.html', {
+        'post': comment.post,
+        'root': comment,
+        'comments': replies,
+    })
+
+
+def comments_cursor(request):
+    # При переподключении браузер передаёт последний полученный id.
+    since = request.META.get('HTTP_LAST_EVENT_ID') or request.GET.get(
+        'since', '')
+    return int(since) if since.isdigit() else 0
+
+
+def comments_feed(request, post_id):
+    """Новые комментарии записи после курсора `since` в JSON."""
+    post = get_object_or_404(Post.objects.published().only('pk'),
+                             pk=post_id)
+    comments = live.comments_since(post.pk, comments_cursor(request))
+    return JsonResponse({
+        'comments': [live.serialize(comment) for comment in comments],
+        'cursor': comments[-1].pk if comments else comments_cursor(request),
+    })
+
+
+def comments_stream(request, post_id):
+    """Поток SSE с новыми комментариями записи."""
+    post = get_object_or_404(Post.objects.published().only('pk'),
+                             pk=post_id)
+    response = StreamingHttpResponse(
+        live.stream(post.pk, comments_cursor(request)),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None,
                     request.FILES or None)
+    schedule_form = ScheduleForm(request.POST or None)
 
-    if form.is_valid():
+    if form.is_valid() and schedule_form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
+        publish_at = schedule_form.cleaned_data['publish_at']
+        if publish_at is not None:
+            post.publish_at = publish_at
+            post.is_published = False
         post.save()
+        if not post.is_published:
+            schedule(post)
         return redirect('posts:profile', post.author.username)
-    return render(request, 'posts/create_post.html', {'form': form})
+    return render(request, 'posts/create_post.html', {
+        'form': form,
+        'schedule_form': schedule_form,
+    })
 
 
 @login_required
@@ -69,7 +169,10 @@ def post_edit(request, pk):
                     files=request.FILES or None,
                     instance=post)
     if form.is_valid():
-        post.save()
+        post.last_activity = post.edited = timezone.now()
+        # Просмотры пишет только счётчик: полное сохранение затёрло бы
+        # приращения, записанные после загрузки записи.
+        post.save(update_fields=[*form.fields, 'last_activity', 'edited'])
         return redirect('posts:post_detail', pk)
     return render(request, 'posts/create_post.html',
                   {'is_edit': True, 'form': form})
@@ -77,22 +180,108 @@ def post_edit(request, pk):
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.published(), id=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        parent_id = request.POST.get('parent')
+        if parent_id and parent_id.isdigit():
+            comment.parent = post.comments.filter(pk=parent_id).first()
         comment.save()
+        Post.objects.filter(pk=post_id).update(last_activity=timezone.now())
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def redirect_back(request, fallback):
+    """Возвращает на страницу из поля `next`, если она на этом сайте."""
+    next_url = request.POST.get('next')
+    if next_url and is_safe_url(next_url, {request.get_host()},
+                                request.is_secure()):
+        return redirect(next_url)
+    return fallback
+
+
+def react(request, target, target_id, fallback):
+    kind = request.POST.get('kind')
+    if request.method == 'POST' and kind in dict(REACTION_KINDS):
+        toggle(request.user, target, target_id, kind)
+    return redirect_back(request, fallback)
+
+
+@login_required
+def post_react(request, post_id):
+    post = get_object_or_404(Post.objects.published(), pk=post_id)
+    return react(request, 'post', post.pk,
+                 redirect('posts:post_detail', post_id=post.pk))
+
+
 @login_required
+def comment_react(request, comment_id):
+    comment = get_object_or_404(
+        Comment.objects.filter(post__is_published=True), pk=comment_id)
+    return react(request, 'comment', comment.pk,
+                 redirect('posts:post_detail', post_id=comment.post_id))
+
+
+@login_required
+def post_bookmark(request, post_id):
+    post = get_object_or_404(Post.objects.published(), pk=post_id)
+    if request.method == 'POST':
+        deleted, _ = Bookmark.objects.filter(
+            user=request.user, post=post,
+        ).delete()
+        if not deleted:
+            Bookmark.objects.get_or_create(user=request.user, post=post)
+    return redirect_back(
+        request, redirect('posts:post_detail', post_id=post.pk),
+    )
+
+
+@login_required
+@user_fragments
+def notification_list(request):
+    page_obj = keyset_paginator(
+        request.user.notifications.select_related('actor', 'post'),
+        request,
+    )
+    if page_obj.is_first and page_obj.object_list:
+        notifications.mark_read(request.user, page_obj.object_list[0].pk)
+    return render(request, 'posts/notifications.html', {
+        'page_obj': page_obj,
+    })
+
+
+@login_required
+@user_fragments
+def saved_posts(request):
+    bookmarks = request.user.bookmarks.filter(
+        post__is_published=True,
+    ).select_related('post__author', 'post__group')
+    page_obj = keyset_paginator(
+        bookmarks, request, ordering=('-created', '-pk'),
+    )
+    return render(request, 'posts/saved.html', {
+        'page_obj': page_obj,
+        'posts': [bookmark.post for bookmark in page_obj],
+    })
+
+
+@login_required
+@user_fragments
 def follow_index(request):
-    posts = Post.objects.filter(
-        author__following__user=request.user)
+    posts = Post.objects.published().select_related(
+        'author', 'group',
+    ).filter(author__following__user=request.user)
+    suggestions = FollowSuggestion.objects.filter(
+        user=request.user,
+    ).exclude(
+        author__following__user=request.user,
+    ).select_related('author').order_by('-score')[:settings.SUGGESTIONS_SHOWN]
     context = {
         'page_obj': paginator(posts, request),
+        'suggestions': suggestions,
     }
     return render(request, 'posts/follow.html', context)
 
@@ -113,3 +302,51 @@ def profile_unfollow(request, username):
     if follow:
         follow.delete()
     return redirect('posts:profile', author.username)
+
+
+@login_required
+def bulk_follow(request):
+    """Подписка или отписка от нескольких авторов за один запрос."""
+    form = BulkFollowForm(request.POST or None)
+    if not form.is_valid():
+        return render(request, 'posts/bulk_follow.html', {'form': form})
+    authors = User.objects.filter(
+        username__in=form.cleaned_data['usernames'],
+    ).exclude(pk=request.user.pk)
+    if form.cleaned_data['unfollow']:
+        Follow.objects.filter(user=request.user, author__in=authors).delete()
+    else:
+        Follow.objects.bulk_create(
+            [
+                Follow(user=request.user, author_id=author_id)
+                for author_id in authors.values_list('pk', flat=True)
+            ],
+            ignore_conflicts=True,
+        )
+    return redirect('posts:follow_index')
+
+
+@user_fragments
+def follower_list(request, username):
+    author = get_object_or_404(User, username=username)
+    follows = author.following.select_related('user')
+    page_obj = keyset_paginator(follows, request)
+    return render(request, 'posts/follow_list.html', {
+        'author': author,
+        'is_followers': True,
+        'page_obj': page_obj,
+        'users': [follow.user for follow in page_obj],
+    })
+
+
+@user_fragments
+def following_list(request, username):
+    author = get_object_or_404(User, username=username)
+    follows = author.follower.select_related('author')
+    page_obj = keyset_paginator(follows, request)
+    return render(request, 'posts/follow_list.html', {
+        'author': author,
+        'is_followers': False,
+        'page_obj': page_obj,
+        'users': [follow.author for follow in page_obj],
+    })
@@ -0,0 +1,20 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth import invalidate_user
+
+User = get_user_model()
+
+
+@receiver((post_save, post_delete), sender=User)
+def invalidate_changed_user(sender, instance, **kwargs):
+    """Смена пароля и любые изменения пользователя сбрасывают кэш."""
+    invalidate_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def invalidate_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_user(user.pk)
@@ -0,0 +1,64 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from users.auth import USER_CACHE_KEY
+
+User = get_user_model()
+
+
+class CachedSessionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_no_session_or_user_queries(self):
+        """Сессия и пользователь берутся из кэша без запросов к базе."""
+        url = reverse('posts:follow_index')
+        self.authorized_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+        tables = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('django_session', tables)
+        self.assertNotIn('FROM "auth_user"', tables)
+
+    def test_password_change_invalidates_user(self):
+        """Смена пароля сбрасывает кэш и завершает старые сессии."""
+        self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertIsNotNone(cache.get(USER_CACHE_KEY.format(self.user.pk)))
+        self.user.set_password('new-password-123')
+        self.user.save()
+        self.assertIsNone(cache.get(USER_CACHE_KEY.format(self.user.pk)))
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_purge_expired_sessions(self):
+        """Команда удаляет истёкшие сессии пачками."""
+        Session.objects.bulk_create(
+            Session(
+                session_key=f'expired{number}',
+                session_data='',
+                expire_date=timezone.now() - timedelta(days=1),
+            )
+            for number in range(5)
+        )
+        out = StringIO()
+        call_command('purge_sessions', batch_size=2, pause=0, stdout=out)
+        self.assertIn('Удалено сессий: 5.', out.getvalue())
+        self.assertTrue(Session.objects.exists())
@@ -33,11 +33,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.SlowQueryLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.CachedAuthenticationMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -65,6 +69,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+DB_PROFILE = os.getenv('DB_PROFILE', 'development')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
@@ -72,6 +78,39 @@ DATABASES = {
     },
 }
 
+# Профиль SQLite для production: WAL позволяет читать во время записи,
+# synchronous=NORMAL в режиме WAL не теряет согласованность при сбое.
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+SQLITE_PRAGMAS = {}
+
+if DB_PROFILE == 'production':
+    SQLITE_PRAGMAS = SQLITE_PRODUCTION_PRAGMAS
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    DATABASES['default']['OPTIONS'] = {'timeout': 5}
+
+# Реплика для чтения. Локально можно указать копию db.sqlite3 или сам
+# db.sqlite3: это отдельное соединение с теми же данными.
+REPLICA_DATABASE = None
+
+if os.getenv('DB_REPLICA_NAME'):
+    REPLICA_DATABASE = 'replica'
+    DATABASES[REPLICA_DATABASE] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME'),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+REPLICA_READ_YOUR_WRITES: int = 10
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -109,14 +148,183 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 NUM_PAGES: int = 10
 
+GROUP_CACHE_TIMEOUT: int = 60 * 60
+
+PAGE_CACHE_TIMEOUT: int = 60 * 60
+
+BULK_FOLLOW_LIMIT: int = 100
+
+SUGGESTIONS_SHOWN: int = 5
+
+# Популярное: период полураспада вклада события в секундах, веса
+# событий и вес, ниже которого запись выпадает из списка.
+TRENDING_HALF_LIFE: int = 6 * 60 * 60
+
+TRENDING_WEIGHTS = {'view': 1, 'comment': 5, 'reaction': 3}
+
+TRENDING_MIN_WEIGHT: float = 0.1
+
+# Счётчики просмотров и реакций копятся в памяти процесса и записываются
+# пачкой: при падении теряется не больше чем за интервал или число
+# записей до сброса.
+COUNTER_FLUSH_INTERVAL: int = 10
+
+COUNTER_MAX_PENDING: int = 1000
+
+# Ветки комментариев: предельная глубина ответов, глубина, до которой
+# ветка раскрыта на странице записи, и число комментариев на странице.
+COMMENT_MAX_DEPTH: int = 5
+
+COMMENT_EXPANDED_DEPTH: int = 2
+
+COMMENTS_PER_PAGE: int = 50
+
+# Поток новых комментариев: период опроса версий в кэше, интервал
+# пустых событий, время жизни соединения и пауза до переподключения.
+# Открытый поток занимает рабочий поток сервера на всё время жизни
+# соединения.
+COMMENT_STREAM_POLL: float = 1.0
+
+COMMENT_STREAM_HEARTBEAT: int = 15
+
+COMMENT_STREAM_TIMEOUT: int = 60
+
+COMMENT_STREAM_RETRY_MS: int = 3000
+
+# Уведомления: размер пачки подписчиков на один INSERT и UPDATE.
+NOTIFICATION_BATCH_SIZE: int = 500
+
+# Подборки новых записей: адрес сайта для ссылок в письмах, число
+# подписчиков в пачке, писем в одной отправке и записей в письме.
+SITE_URL = os.getenv('SITE_URL', 'http://localhost:8000')
+
+DIGEST_BATCH_SIZE: int = 500
+
+DIGEST_SEND_CHUNK: int = 100
+
+DIGEST_MAX_POSTS: int = 10
+
+# Фоновые задачи: срок аренды задачи обработчиком, число попыток,
+# начальная и предельная пауза перед повтором, потоки обработчика
+# и период опроса очереди.
+JOB_LEASE: int = 5 * 60
+
+JOB_MAX_ATTEMPTS: int = 5
+
+JOB_RETRY_BASE: int = 30
+
+JOB_RETRY_MAX: int = 60 * 60
+
+JOB_WORKER_THREADS: int = 4
+
+JOB_POLL_INTERVAL: float = 1.0
+
+# Отложенная публикация: сколько записей публиковать за одно обновление.
+PUBLISH_BATCH_SIZE: int = 500
+
+# Сессии читаются из файлового кэша без локального уровня, чтобы
+# изменения сессии сразу были видны всем процессам; база остаётся
+# запасной. Кэш сессий отдельный: вытеснение страниц их не задевает.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+SESSION_CACHE_ALIAS = 'sessions'
+
+USER_CACHE_TIMEOUT: int = 60
+
 CUT_TEXT: int = 15
 
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Каталог доступен только приложению: файловый кэш хранит pickle,
+# и чужой файл в нём исполнился бы при чтении.
+CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(BASE_DIR, 'cache'))
+
+# Горячие ключи отдаются из памяти процесса без ввода-вывода, общий
+# уровень и журнал удалённых ключей лежат в файловом кэше. При
+# превышении MAX_ENTRIES файловый кэш на каждой записи перебирает
+# каталог и удаляет треть файлов, поэтому предел задан с запасом.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'LOCAL_MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 5,
+            'SYNC_INTERVAL': 1,
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'shared'),
+        'OPTIONS': {'MAX_ENTRIES': 100_000},
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'sessions'),
+        'OPTIONS': {'MAX_ENTRIES': 200_000},
+    },
+}
+
+TEST_RUNNER = 'core.testing.TestRunner'
+
+QUERY_BUDGET_ENFORCE = DEBUG
+
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0.01'))
+
+PROFILING_SLOW_QUERIES: int = 3
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+
+# Страница метрик сводит все файлы каталога, поэтому он, как и кэш,
+# не должен быть доступен на запись другим пользователям.
+METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(BASE_DIR, 'metrics'))
+
+METRICS_FLUSH_INTERVAL: int = 5
+
+THUMBNAIL_BACKEND = 'core.thumbnail.TimedThumbnailBackend'
+
+_slow_query_threshold = os.getenv('SLOW_QUERY_THRESHOLD_MS', '100')
+
+SLOW_QUERY_THRESHOLD_MS = (
+    float(_slow_query_threshold) if _slow_query_threshold else None
+)
+
+SLOW_QUERY_LOG = os.getenv(
+    'SLOW_QUERY_LOG', os.path.join(BASE_DIR, 'slow_queries.log'),
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {
+            'format': '%(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+        'slow_queries': {
+            'class': 'logging.FileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'formatter': 'message',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'yatube': {
+            'handlers': ['console'],
+            'level': os.getenv('YATUBE_LOG_LEVEL', 'INFO'),
+        },
+        'yatube.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }